@@ -31,10 +31,17 @@ STATS_DB_FILE = "bot_stats.db"
 class AppManager:
     """Manages application lifecycle, statistics, and process tracking."""
     
-    def __init__(self):
-        """Initialize AppManager with config and load saved data."""
-        self.config = get_config()
+    def __init__(self, pids_file: Optional[str] = None, stats_db: Optional[str] = None,
+                 config: Optional[Any] = None):
+        """Initialize AppManager with config and load saved data.
+
+        Paths and config default to RUNNING_PIDS_FILE, STATS_DB_FILE and get_config().
+        """
+        self.pids_file = pids_file if pids_file is not None else RUNNING_PIDS_FILE
+        self.stats_db = stats_db if stats_db is not None else STATS_DB_FILE
+        self.config = config if config is not None else get_config()
         self.running_pids: Dict[str, int] = {}
+        self._conn: Optional[sqlite3.Connection] = None
         self._load_pids()
         self._init_stats_db()
         logger.info("AppManager инициализирован")
@@ -42,8 +49,8 @@ class AppManager:
     def _load_pids(self) -> None:
         """Load running PIDs from file."""
         try:
-            if Path(RUNNING_PIDS_FILE).exists():
-                with open(RUNNING_PIDS_FILE, "r", encoding="utf-8") as f:
+            if Path(self.pids_file).exists():
+                with open(self.pids_file, "r", encoding="utf-8") as f:
                     data = json.load(f)
                     self.running_pids = {k: int(v) for k, v in data.items()}
                     logger.info(f"Загружено {len(self.running_pids)} PIDs из файла")
@@ -57,17 +64,24 @@ class AppManager:
     def save_pids(self) -> None:
         """Save running PIDs to file."""
         try:
-            with open(RUNNING_PIDS_FILE, "w", encoding="utf-8") as f:
+            with open(self.pids_file, "w", encoding="utf-8") as f:
                 json.dump(self.running_pids, f, indent=4, ensure_ascii=False)
         except Exception as e:
             logger.error(f"Ошибка сохранения PID: {e}")
     
     def _init_stats_db(self) -> None:
-        """Initialize statistics database."""
+        """Open the statistics database connection and ensure the schema."""
         try:
-            conn = sqlite3.connect(STATS_DB_FILE)
+            # Одно соединение на всё время жизни менеджера, без переоткрытия БД
+            conn = self._conn = sqlite3.connect(self.stats_db, check_same_thread=False)
             cursor = conn.cursor()
             
+            if self.stats_db == ":memory:":
+                # БД в памяти не нужна устойчивость: без fsync и временных файлов
+                # (журнал такой БД и так держится в памяти)
+                cursor.execute("PRAGMA synchronous=OFF")
+                cursor.execute("PRAGMA temp_store=MEMORY")
+            
             # Проверяем, существует ли таблица
             cursor.execute("""
                 SELECT name FROM sqlite_master 
@@ -114,11 +128,15 @@ class AppManager:
                     )
                 """)
                 conn.commit()
-            
-            conn.close()
         except Exception as e:
             logger.error(f"Ошибка инициализации БД статистики: {e}")
     
+    def close(self) -> None:
+        """Close the statistics database connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
     def _get_process_name(self, app_name: str) -> Optional[str]:
         """Get process name for app from config."""
         return self.config.get_process_name(app_name)
@@ -300,42 +318,35 @@ class AppManager:
     
     def _record_launch(self, app_name: str) -> None:
         """Record application launch in statistics."""
+        self._record_launches(app_name, 1)
+    
+    def _record_launches(self, app_name: str, count: int = 1) -> None:
+        """Record several application launches with a single UPSERT."""
         try:
-            conn = sqlite3.connect(STATS_DB_FILE)
+            conn = self._conn
             cursor = conn.cursor()
             
-            # Проверяем, есть ли запись
-            cursor.execute("SELECT launches FROM app_stats WHERE app_name = ?", (app_name,))
-            row = cursor.fetchone()
-            
             now = datetime.now().isoformat()
             session_start = time.time()
             
-            if row:
-                # Обновляем существующую запись
-                cursor.execute("""
-                    UPDATE app_stats 
-                    SET launches = launches + 1,
-                        last_launch = ?,
-                        last_session_start = ?
-                    WHERE app_name = ?
-                """, (now, session_start, app_name))
-            else:
-                # Создаем новую запись
-                cursor.execute("""
-                    INSERT INTO app_stats (app_name, launches, last_launch, last_session_start)
-                    VALUES (?, 1, ?, ?)
-                """, (app_name, now, session_start))
+            # Один запрос вместо SELECT + UPDATE/INSERT, один commit на пачку
+            cursor.execute("""
+                INSERT INTO app_stats (app_name, launches, last_launch, last_session_start)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(app_name) DO UPDATE
+                SET launches = launches + excluded.launches,
+                    last_launch = excluded.last_launch,
+                    last_session_start = excluded.last_session_start
+            """, (app_name, count, now, session_start))
             
             conn.commit()
-            conn.close()
         except Exception as e:
             logger.error(f"Ошибка записи статистики запуска для {app_name}: {e}")
     
     def _record_session_end(self, app_name: str) -> None:
         """Record application session end and update total time."""
         try:
-            conn = sqlite3.connect(STATS_DB_FILE)
+            conn = self._conn
             cursor = conn.cursor()
             
             # Получаем время начала сессии
@@ -355,8 +366,6 @@ class AppManager:
                 """, (session_duration, app_name))
                 
                 conn.commit()
-            
-            conn.close()
         except Exception as e:
             logger.error(f"Ошибка записи статистики закрытия для {app_name}: {e}")
     
@@ -365,8 +374,7 @@ class AppManager:
         stats: Dict[str, Dict[str, Any]] = {}
         
         try:
-            conn = sqlite3.connect(STATS_DB_FILE)
-            cursor = conn.cursor()
+            cursor = self._conn.cursor()
             
             # Получаем статистику для всех приложений из конфига
             all_apps = self.config.get_all_apps()
@@ -394,8 +402,6 @@ class AppManager:
                         "total_time": 0.0,
                         "last_launch": "никогда"
                     }
-            
-            conn.close()
         except Exception as e:
             logger.error(f"Ошибка получения статистики: {e}")
             # Возвращаем пустую статистику для всех приложений
@@ -54,9 +54,9 @@ if not GUI_AVAILABLE:
     sys.exit(0)
 
 # Teper mozhno importirovat customtkinter
-import threading
-import time
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Dict, Iterator, List, Optional
 import customtkinter as ctk
 
 COLORS = {
@@ -74,6 +74,51 @@ COLORS = {
 }
 
 
+REQUIRED_FILES = ('gui.py', 'bot.py', 'app_manager.py', 'config.py', 'responses.py')
+REQUIRED_ENV_KEYS = (b"TELEGRAM_BOT_TOKEN", b"ADMIN_ID")
+_UTF8_BOM = b"\xef\xbb\xbf"
+
+# Фоновый пул для блокирующих операций (Tk трогаем только из главного потока)
+_EXEC = ThreadPoolExecutor(max_workers=1, thread_name_prefix="launcher")
+
+
+def read_env_keys(env_path: Path, keys=REQUIRED_ENV_KEYS) -> Dict[str, str]:
+    """Read only the needed keys from .env, stopping once all are found."""
+    found: Dict[str, str] = {}
+    # Префиксы считаем один раз: строки, которые не начинаются с нужного ключа
+    # или с "export", отсеиваются одним startswith без полного разбора
+    prefixes = tuple(keys) + (b"export",)
+    with open(env_path, 'rb') as f:
+        # BOM может стоять только в начале файла, поэтому снимаем его с первой строки
+        first = f.readline()
+        if first.startswith(_UTF8_BOM):
+            first = first[len(_UTF8_BOM):]
+        for line in chain((first,), f):
+            line = line.lstrip()
+            if not line.startswith(prefixes):
+                continue
+            # Синтаксис как у python-dotenv: пробелы вокруг "=" и префикс "export "
+            if line.startswith(b"export "):
+                line = line[len(b"export "):]
+            key, sep, value = line.partition(b"=")
+            key = key.strip()
+            if not sep or key not in keys:
+                continue
+            value = value.strip()
+            # Значение в одинаковых кавычках dotenv тоже отдает без них
+            if len(value) >= 2 and value[:1] in (b'"', b"'") and value[-1:] == value[:1]:
+                value = value[1:-1]
+            found.setdefault(key.decode(), value.decode('utf-8', 'ignore'))
+            if len(found) == len(keys):
+                break
+    return found
+
+
+def _preload_main_app() -> None:
+    """Import the main GUI modules ahead of time (no Tk calls here)."""
+    import gui  # noqa: F401
+
+
 class LauncherGUI:
     """Beautiful launcher GUI with validation."""
 
@@ -93,6 +138,9 @@ class LauncherGUI:
         self.progress_text_var = ctk.StringVar(value="0%")
         self.launch_complete = False
 
+        # Пока крутится анимация, импортируем модули главного окна в фоне
+        self._preload = _EXEC.submit(_preload_main_app)
+
         self.create_ui()
         self.start_launch()
 
@@ -182,59 +230,63 @@ class LauncherGUI:
                 self.progress_var.set(value)
                 self.status_var.set(status)
                 self.progress_text_var.set(f"{int(value)}%")
-                self.root.update()
         except:
             pass
 
-    def animate_progress(self, start_value: float, end_value: float, status: str, duration: float = 1.0):
-        """Animate progress from start to end value."""
+    def animate_progress(self, start_value: float, end_value: float, status: str,
+                         duration: float = 1.0) -> Iterator[int]:
+        """Animate progress from start to end value, yielding delays in ms."""
         if start_value >= end_value:
             self.update_progress(end_value, status)
             return
 
         steps = int(end_value - start_value)
-        step_duration = duration / steps if steps > 0 else duration
+        step_ms = int(duration * 1000 / steps) if steps > 0 else int(duration * 1000)
 
         for i in range(steps + 1):
             current_value = start_value + i
             self.update_progress(current_value, status)
-            time.sleep(step_duration)
+            yield step_ms
 
     def show_error(self, error: str):
         """Show error message."""
         try:
             if not self.launch_complete:
                 self.error_var.set(f"ERROR: {error}")
-                self.root.update()
         except:
             pass
 
-    def check_env_file(self) -> bool:
+    def check_env_file(self, entries: Optional[Dict[str, os.DirEntry]] = None) -> bool:
         """Check if .env file exists and has required variables."""
         env_path = Path('.env')
         
-        if not env_path.exists():
+        # Если каталог уже прочитан через scandir, не делаем лишний stat()
+        if entries is not None:
+            env_exists = '.env' in entries
+        else:
+            env_exists = env_path.exists()
+        
+        if not env_exists:
             self.show_error(".env файл не найден! Создай его из .env.example")
             return False
 
         # Читаем и проверяем содержимое
         try:
-            with open(env_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            values = read_env_keys(env_path)
             
             # Проверяем наличие и валидность переменных
             errors = []
             
-            if 'TELEGRAM_BOT_TOKEN=' not in content:
+            token = values.get('TELEGRAM_BOT_TOKEN')
+            if token is None:
                 errors.append("TELEGRAM_BOT_TOKEN отсутствует")
-            elif 'TELEGRAM_BOT_TOKEN=your_bot_token_here' in content or \
-                 'TELEGRAM_BOT_TOKEN=' in content and not any(c.isdigit() for c in content.split('TELEGRAM_BOT_TOKEN=')[1].split('\n')[0]):
+            elif token == 'your_bot_token_here' or not any(c.isdigit() for c in token):
                 errors.append("TELEGRAM_BOT_TOKEN не настроен")
             
-            if 'ADMIN_ID=' not in content:
+            admin_id = values.get('ADMIN_ID')
+            if admin_id is None:
                 errors.append("ADMIN_ID отсутствует")
-            elif 'ADMIN_ID=your_telegram_id_here' in content or \
-                 'ADMIN_ID=' in content and not content.split('ADMIN_ID=')[1].split('\n')[0].strip().isdigit():
+            elif not admin_id.isdigit():
                 errors.append("ADMIN_ID не настроен (должен быть числом)")
             
             if errors:
@@ -250,6 +302,7 @@ class LauncherGUI:
     def launch_main_app(self):
         """Launch the main GUI application."""
         try:
+            self._preload.result()
             from gui import AppManagerGUI
             app = AppManagerGUI()
             self.root.destroy()
@@ -257,58 +310,75 @@ class LauncherGUI:
         except Exception as e:
             self.show_error(f"Ошибка запуска: {e}")
 
-    def launch_process(self):
-        """Main launch process."""
-        try:
-            current_progress = 0
+    def _init_config(self):
+        """Load config in the background pool (may touch the disk)."""
+        from config import get_config
+        return get_config()
 
-            # Step 1: Check files
-            self.animate_progress(current_progress, 10, "Проверка файлов проекта...", 0.5)
-            current_progress = 10
-            time.sleep(0.3)
-            
-            required_files = ['gui.py', 'bot.py', 'app_manager.py', 'config.py', 'responses.py']
-            missing_files = [f for f in required_files if not Path(f).exists()]
-            
-            if missing_files:
-                self.show_error(f"Отсутствуют файлы: {', '.join(missing_files)}")
-                return
-
-            # Step 2: Check .env
-            self.animate_progress(current_progress, 50, "Проверка конфигурации...", 1.0)
-            current_progress = 50
-            time.sleep(0.5)
-            
-            if not self.check_env_file():
-                return
-            
-            self.animate_progress(current_progress, 70, "Конфигурация OK ✓", 0.5)
-            current_progress = 70
+    def _steps(self) -> Iterator[int]:
+        """Main launch process; each yield is the delay in ms before the next step."""
+        current_progress = 0
 
-            # Step 3: Initialize config
-            self.animate_progress(current_progress, 90, "Инициализация конфигурации...", 0.5)
-            current_progress = 90
-            time.sleep(0.3)
-            
-            try:
-                from config import get_config
-                config = get_config()
-                self.animate_progress(current_progress, 100, "Готово! Запуск...", 0.3)
-            except Exception as e:
-                self.show_error(f"Ошибка инициализации: {e}")
-                return
-
-            # Step 4: Launch
-            time.sleep(0.5)
-            self.root.after(100, self.launch_main_app)
+        # Step 1: Check files
+        yield from self.animate_progress(current_progress, 10, "Проверка файлов проекта...", 0.5)
+        current_progress = 10
+        yield 300
+        
+        # Один проход по каталогу вместо отдельного stat() на каждый файл
+        with os.scandir('.') as it:
+            entries = {e.name: e for e in it}
+        missing_files = [f for f in REQUIRED_FILES if f not in entries]
+        
+        if missing_files:
+            self.show_error(f"Отсутствуют файлы: {', '.join(missing_files)}")
+            return
 
+        # Step 2: Check .env
+        yield from self.animate_progress(current_progress, 50, "Проверка конфигурации...", 1.0)
+        current_progress = 50
+        yield 500
+        
+        if not self.check_env_file(entries):
+            return
+        
+        yield from self.animate_progress(current_progress, 70, "Конфигурация OK ✓", 0.5)
+        current_progress = 70
+
+        # Step 3: Initialize config
+        future = _EXEC.submit(self._init_config)
+        yield from self.animate_progress(current_progress, 90, "Инициализация конфигурации...", 0.5)
+        current_progress = 90
+        yield 300
+        
+        while not future.done():
+            yield 50
+        
+        try:
+            future.result()
+        except Exception as e:
+            self.show_error(f"Ошибка инициализации: {e}")
+            return
+        yield from self.animate_progress(current_progress, 100, "Готово! Запуск...", 0.3)
+
+        # Step 4: Launch
+        yield 600
+        self.launch_main_app()
+
+    def _drive(self):
+        """Advance the launch process by one step on the Tk thread."""
+        try:
+            delay = next(self._launch_steps)
+        except StopIteration:
+            return
         except Exception as e:
             self.show_error(f"Неожиданная ошибка: {e}")
+            return
+        self.root.after(delay, self._drive)
 
     def start_launch(self):
-        """Start the launch process in background thread."""
-        thread = threading.Thread(target=self.launch_process, daemon=True)
-        thread.start()
+        """Start the launch process, driven by the Tk event loop."""
+        self._launch_steps = self._steps()
+        self.root.after_idle(self._drive)
 
     def run(self):
         self.root.mainloop()
@@ -3,36 +3,165 @@ Unit tests for SONYA application manager.
 Базовые unit-тесты для менеджера приложений.
 """
 
+import ast
+import copy
+import importlib
+import io
+import json
 import os
+import shutil
 import sqlite3
 import subprocess
 import tempfile
 import unittest
+from concurrent.futures import Future
+from contextlib import closing, contextmanager, redirect_stderr, redirect_stdout
 from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock
+from types import MappingProxyType, SimpleNamespace
+from unittest.mock import DEFAULT, AsyncMock, Mock, patch, mock_open
 
-# Импортируем модули для тестирования
 import sys
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from telegram import Update
+from telegram.error import NetworkError, RetryAfter, TelegramError, TimedOut
+
+# Импортируем модули для тестирования
+import app_manager as app_manager_mod
+import config as config_mod
+import version_manager as version_manager_mod
 from app_manager import AppManager
-from config import ConfigManager
+from config import ConfigManager, DEFAULT_CONFIG
+from version_manager import VersionManager
+
+# gui и launcher требуют customtkinter; без него GUI-классы тестов пропускаются
+try:
+    import customtkinter  # noqa: F401
+    _HAS_CTK = True
+except Exception:
+    _HAS_CTK = False
+
+if _HAS_CTK:
+    from gui import AppManagerGUI, TextHandler
+
+# bot читает токен и ADMIN_ID из окружения прямо при импорте
+_BOT_ENV = {'TELEGRAM_BOT_TOKEN': 'test_token_123', 'ADMIN_ID': '123456789'}
+with patch.dict(os.environ, _BOT_ENV):
+    import bot
+    from bot import (error_handler, handle_message, help_command, main,
+                     rate_limit, reply_log, start)
+
+# Нетронутая копия конфига по умолчанию, снятая один раз при импорте
+_DEFAULT_CFG = copy.deepcopy(DEFAULT_CONFIG)
+
+# Неизменяемые ответы get_stats для тестов статистики бота
+_STATS_OK = MappingProxyType({"test_app": MappingProxyType({
+    "launches": 1,
+    "total_time": 100,
+    "last_launch": "2025-01-01T10:00:00",
+})})
+_STATS_BAD_DATE = MappingProxyType({"test_app": MappingProxyType({
+    "launches": 1,
+    "total_time": 100,
+    "last_launch": "invalid-date",
+})})
+
+
+def _is_main_guard(test):
+    """Check whether an ``if`` test is ``__name__ == "__main__"`` (without ast.unparse, 3.9+)."""
+    return (isinstance(test, ast.Compare)
+            and isinstance(test.left, ast.Name) and test.left.id == '__name__'
+            and len(test.ops) == 1 and isinstance(test.ops[0], ast.Eq)
+            and isinstance(test.comparators[0], ast.Constant)
+            and test.comparators[0].value == '__main__')
+
+
+def _compile_main_block(path):
+    """Compile only the module's ``if __name__ == "__main__"`` block."""
+    tree = ast.parse(Path(path).read_text(encoding='utf-8'), filename=path)
+    body = [node for node in tree.body if isinstance(node, ast.If) and _is_main_guard(node.test)]
+    return compile(ast.Module(body=body, type_ignores=[]), path, 'exec')
+
+
+# main-блок config.py разбирается и компилируется один раз при импорте
+_CONFIG_MAIN_CODE = _compile_main_block(config_mod.__file__)
+
+
+def make_config(cfg=_DEFAULT_CFG):
+    """Build a ConfigManager from a cached dict, skipping load/auto-detect/save."""
+    config_obj = ConfigManager.__new__(ConfigManager)
+    config_obj.config = copy.deepcopy(cfg)
+    return config_obj
+
+
+@contextmanager
+def swap(obj, **attrs):
+    """Temporarily set attributes with plain setattr, without patch() bookkeeping."""
+    old = {name: getattr(obj, name) for name in attrs}
+    for name, value in attrs.items():
+        setattr(obj, name, value)
+    try:
+        yield obj
+    finally:
+        for name, value in old.items():
+            setattr(obj, name, value)
+
+
+def _raiser(exc):
+    """Build a callable that raises exc, a cheap stand-in for side_effect=exc."""
+    def fake(*args, **kwargs):
+        raise exc
+    return fake
+
+
+_sqlite_connect = sqlite3.connect
+
+
+def _connect_uri(database, *args, **kwargs):
+    """sqlite3.connect that opens "file:" paths as URIs, e.g. a shared in-memory DB."""
+    if isinstance(database, str) and database.startswith("file:"):
+        kwargs.setdefault('uri', True)
+    return _sqlite_connect(database, *args, **kwargs)
+
+
+def _clear_temp_dir(path):
+    """Remove everything inside a class-level temp dir between tests."""
+    # Тесты создают лишь пару плоских файлов, rmtree здесь избыточен
+    for entry in os.scandir(path):
+        if entry.is_dir(follow_symlinks=False):
+            _remove_temp_dir(entry.path)
+        else:
+            os.unlink(entry.path)
+
+
+def _remove_temp_dir(path):
+    """Remove a temp dir created by the tests."""
+    _clear_temp_dir(path)
+    os.rmdir(path)
 
 
 class TestConfigManager(unittest.TestCase):
     """Tests for ConfigManager."""
     
+    @classmethod
+    def setUpClass(cls):
+        """Create one temp dir shared by the whole class."""
+        cls.temp_dir = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the shared temp dir."""
+        _remove_temp_dir(cls.temp_dir)
+
     def setUp(self):
         """Set up test fixtures."""
-        self.temp_dir = tempfile.mkdtemp()
+        _clear_temp_dir(self.temp_dir)
         self.config_file = os.path.join(self.temp_dir, "app_config.json")
-        os.environ['CONFIG_FILE'] = self.config_file
-    
+        self._env_patch = patch.dict(os.environ, {'CONFIG_FILE': self.config_file})
+        self._env_patch.start()
+
     def tearDown(self):
-        """Clean up after tests."""
-        import shutil
-        if os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
+        """Restore the environment."""
+        self._env_patch.stop()
     
     def test_config_loading(self):
         """Test configuration loading."""
@@ -56,13 +185,10 @@ class TestConfigManager(unittest.TestCase):
             }
         }
         
-        import json
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(test_config, f, ensure_ascii=False)
+        Path(self.config_file).write_text(json.dumps(test_config, ensure_ascii=False), encoding='utf-8')
         
         # Мокаем CONFIG_FILE в config.py
-        import config
-        original_config_file = config.CONFIG_FILE
+        original_config_file = config_mod.CONFIG_FILE
         
         # Патчим CONFIG_FILE
         config_patcher = patch('config.CONFIG_FILE', self.config_file)
@@ -70,10 +196,10 @@ class TestConfigManager(unittest.TestCase):
         
         try:
             # Сбрасываем singleton
-            config._config_manager = None
+            config_mod._config_manager = None
             
             # Тестируем загрузку
-            test_config_obj = config.ConfigManager()
+            test_config_obj = config_mod.ConfigManager()
             app_config = test_config_obj.get_app_config("test_app")
             
             self.assertIsNotNone(app_config)
@@ -82,8 +208,8 @@ class TestConfigManager(unittest.TestCase):
         finally:
             # Восстанавливаем
             config_patcher.stop()
-            config.CONFIG_FILE = original_config_file
-            config._config_manager = None
+            config_mod.CONFIG_FILE = original_config_file
+            config_mod._config_manager = None
     
     def test_get_app_command(self):
         """Test getting app command."""
@@ -97,9 +223,7 @@ class TestConfigManager(unittest.TestCase):
             }
         }
         
-        import json
-        with open(self.config_file, 'w') as f:
-            json.dump(test_config, f)
+        Path(self.config_file).write_text(json.dumps(test_config), encoding='utf-8')
         
         config = ConfigManager()
         cmd = config.get_app_command("test_app")
@@ -108,81 +232,90 @@ class TestConfigManager(unittest.TestCase):
         self.assertIsNone(cmd)
 
 
-class TestAppManager(unittest.TestCase):
-    """Tests for AppManager."""
-    
+class _StubConfig:
+    """Plain ConfigManager stand-in returning canned values, without Mock spec introspection."""
+
+    def __init__(self, app, apps, cmd=("/test/path.exe",), proc="test.exe"):
+        self._app = app
+        self._apps = apps
+        self._cmd = list(cmd) if cmd is not None else None
+        self._proc = proc
+
+    def get_app_config(self, app_key):
+        return self._app
+
+    def get_all_apps(self):
+        return self._apps
+
+    def get_app_command(self, app_key):
+        return self._cmd
+
+    def get_process_name(self, app_key):
+        return self._proc
+
+
+class _AppManagerFixtures(unittest.TestCase):
+    """Shared fixtures for AppManager tests: one temp dir and config mock per class."""
+
+    pids_name = "running_pids.json"
+    app_config = {
+        "name": "Test App",
+        "path": "/test/path.exe",
+        "process_name": "test.exe",
+        "args": []
+    }
+    all_apps = {"test_app": {"name": "Test App"}}
+
+    @classmethod
+    def setUpClass(cls):
+        """Create the class temp dir and the config mock once."""
+        cls.temp_dir = tempfile.mkdtemp()
+        # Заглушка конфига строится один раз на класс, тесты её не пересоздают
+        cls._stub_config = _StubConfig(cls.app_config, cls.all_apps)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the shared temp dir."""
+        _remove_temp_dir(cls.temp_dir)
+
     def setUp(self):
         """Set up test fixtures."""
-        # Сбрасываем singleton перед каждым тестом
-        import app_manager
-        app_manager._manager = None
-        
-        self.temp_dir = tempfile.mkdtemp()
-        self.pids_file = os.path.join(self.temp_dir, "running_pids.json")
-        self.stats_db = os.path.join(self.temp_dir, "bot_stats.db")
-        
-        # Удаляем старую БД если есть
-        if os.path.exists(self.stats_db):
-            os.remove(self.stats_db)
-        
-        # Мокаем файлы
-        self.patcher1 = patch('app_manager.RUNNING_PIDS_FILE', self.pids_file)
-        self.patcher2 = patch('app_manager.STATS_DB_FILE', self.stats_db)
-        self.patcher1.start()
-        self.patcher2.start()
-        
-        # Мокаем config
-        mock_config = Mock(spec=ConfigManager)
-        mock_config.get_app_config.return_value = {
+        _clear_temp_dir(self.temp_dir)
+        self.pids_file = os.path.join(self.temp_dir, self.pids_name)
+        # Статистика живёт в памяти, соединение менеджера держит её до close()
+        self.stats_db = ":memory:"
+
+        self.manager = AppManager(pids_file=self.pids_file, stats_db=self.stats_db,
+                                  config=self._stub_config)
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.manager.close()
+
+
+class TestAppManager(_AppManagerFixtures):
+    """Tests for AppManager."""
+
+    all_apps = {
+        "test_app": {
             "name": "Test App",
             "path": "/test/path.exe",
-            "process_name": "test.exe",
-            "args": []
-        }
-        mock_config.get_all_apps.return_value = {
-            "test_app": {
-                "name": "Test App",
-                "path": "/test/path.exe",
-                "process_name": "test.exe"
-            }
+            "process_name": "test.exe"
         }
-        mock_config.get_app_command.return_value = ["/test/path.exe"]
-        mock_config.get_process_name.return_value = "test.exe"
-        
-        self.config_patcher = patch('app_manager.get_config', return_value=mock_config)
-        self.config_patcher.start()
-        
-        # Сбрасываем singleton и создаем новый менеджер
-        app_manager._manager = None
-        self.manager = AppManager()
-    
-    def tearDown(self):
-        """Clean up after tests."""
-        # Останавливаем патчеры
-        self.patcher1.stop()
-        self.patcher2.stop()
-        self.config_patcher.stop()
-        
-        # Сбрасываем singleton
-        import app_manager
-        app_manager._manager = None
-        
-        # Удаляем временные файлы
-        import shutil
-        if os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
+    }
     
     def test_init_stats_db(self):
         """Test statistics database initialization."""
-        # Проверяем, что БД создана
-        self.assertTrue(os.path.exists(self.stats_db))
-        
-        # Проверяем структуру таблицы
-        conn = sqlite3.connect(self.stats_db)
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='app_stats'")
+        # Проверяем структуру таблицы через соединение менеджера (БД в памяти)
+        cursor = self.manager._conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='app_stats'")
         self.assertIsNotNone(cursor.fetchone())
-        conn.close()
+    
+    def test_memory_db_pragmas(self):
+        """Test that an in-memory stats DB skips fsync and temp files."""
+        cursor = self.manager._conn.cursor()
+        self.assertEqual(cursor.execute("PRAGMA synchronous").fetchone()[0], 0)
+        self.assertEqual(cursor.execute("PRAGMA temp_store").fetchone()[0], 2)
     
     def test_save_and_load_pids(self):
         """Test saving and loading PIDs."""
@@ -194,26 +327,14 @@ class TestAppManager(unittest.TestCase):
         self.assertTrue(os.path.exists(self.pids_file))
         
         # Читаем напрямую из файла для проверки
-        import json
-        with open(self.pids_file, 'r', encoding='utf-8') as f:
-            saved_pids = json.load(f)
+        saved_pids = json.loads(Path(self.pids_file).read_text(encoding='utf-8'))
         self.assertEqual(saved_pids.get("test_app"), 12345)
         
         # Создаем новый менеджер и проверяем загрузку
-        # Сбрасываем singleton
-        import app_manager
-        app_manager._manager = None
-        
-        # Используем те же патчеры, что уже активны в setUp
-        mock_config = Mock(spec=ConfigManager)
-        mock_config.get_all_apps.return_value = {"test_app": {}}
-        mock_config.get_app_config.return_value = {"name": "Test"}
-        mock_config.get_process_name.return_value = "test.exe"
-        
-        # Временно патчим get_config
-        with patch('app_manager.get_config', return_value=mock_config):
-            new_manager = AppManager()
-            self.assertEqual(new_manager.running_pids.get("test_app"), 12345)
+        new_manager = AppManager(pids_file=self.pids_file, stats_db=self.stats_db,
+                                 config=self._stub_config)
+        self.addCleanup(new_manager.close)
+        self.assertEqual(new_manager.running_pids.get("test_app"), 12345)
     
     def test_get_stats_empty(self):
         """Test getting empty statistics."""
@@ -259,17 +380,19 @@ class TestAppManager(unittest.TestCase):
         mock_proc.pid = 12345
         mock_popen.return_value = mock_proc
         
-        # Мокаем существование файла
-        with patch('os.path.exists', return_value=True):
+        # CREATE_NEW_PROCESS_GROUP есть только на Windows, подставляем его,
+        # чтобы тест с полностью замоканным Popen шёл на любой платформе
+        with patch('os.path.exists', return_value=True), \
+                patch('app_manager.subprocess.CREATE_NEW_PROCESS_GROUP', 0x200, create=True):
             result = self.manager.launch_app("test_app")
             self.assertTrue(result)
             self.assertEqual(self.manager.running_pids.get("test_app"), 12345)
     
     def test_launch_app_not_in_config(self):
         """Test launching app not in config."""
-        self.manager.config.get_app_config.return_value = None
-        
-        result = self.manager.launch_app("nonexistent_app")
+        # Заглушка конфига общая на класс, подменяем только на время теста
+        with patch.object(self.manager.config, 'get_app_config', return_value=None):
+            result = self.manager.launch_app("nonexistent_app")
         self.assertFalse(result)
     
     @patch('app_manager.subprocess.run')
@@ -290,87 +413,50 @@ class TestAppManager(unittest.TestCase):
                 self.assertIsInstance(closed, list)
 
 
-class TestStatistics(unittest.TestCase):
+class TestStatistics(_AppManagerFixtures):
     """Tests for statistics tracking."""
+
+    pids_name = "pids.json"
+    app_config = {"name": "Test"}
+    all_apps = {"test_app": {}}
     
-    def setUp(self):
-        """Set up test fixtures."""
-        # Сбрасываем singleton перед каждым тестом
-        import app_manager
-        app_manager._manager = None
-        
-        self.temp_dir = tempfile.mkdtemp()
-        self.stats_db = os.path.join(self.temp_dir, "bot_stats.db")
-        self.pids_file = os.path.join(self.temp_dir, "pids.json")
-        
-        # Удаляем старую БД если есть
-        if os.path.exists(self.stats_db):
-            os.remove(self.stats_db)
-        
-        self.patcher1 = patch('app_manager.STATS_DB_FILE', self.stats_db)
-        self.patcher2 = patch('app_manager.RUNNING_PIDS_FILE', self.pids_file)
-        self.patcher1.start()
-        self.patcher2.start()
-        
-        mock_config = Mock(spec=ConfigManager)
-        mock_config.get_app_config.return_value = {"name": "Test"}
-        mock_config.get_all_apps.return_value = {"test_app": {}}
-        mock_config.get_process_name.return_value = "test.exe"
-        
-        self.config_patcher = patch('app_manager.get_config', return_value=mock_config)
-        self.config_patcher.start()
-        
-        # Сбрасываем singleton и создаем новый менеджер
-        app_manager._manager = None
-        self.manager = AppManager()
-    
-    def tearDown(self):
-        """Clean up after tests."""
-        # Останавливаем патчеры
-        self.patcher1.stop()
-        self.patcher2.stop()
-        self.config_patcher.stop()
-        
-        # Сбрасываем singleton
-        import app_manager
-        app_manager._manager = None
-        
-        # Удаляем временные файлы
-        import shutil
-        if os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
-    
-    def test_record_launch(self):
-        """Test recording app launch."""
-        self.manager._record_launch("test_app")
-        
-        stats = self.manager.get_stats()
-        self.assertEqual(stats["test_app"]["launches"], 1)
-        self.assertNotEqual(stats["test_app"]["last_launch"], "никогда")
+    def test_record_launches(self):
+        """Test recording one, two and three launches on a single manager."""
+        # Запуски накапливаются, так что один менеджер проверяет все N
+        for n in (1, 2, 3):
+            with self.subTest(n=n):
+                self.manager._record_launch("test_app")
+                stats = self.manager.get_stats()
+                self.assertEqual(stats["test_app"]["launches"], n)
+                self.assertNotEqual(stats["test_app"]["last_launch"], "никогда")
     
-    def test_record_multiple_launches(self):
-        """Test recording multiple launches."""
-        for _ in range(3):
-            self.manager._record_launch("test_app")
+    def test_record_launches_bulk(self):
+        """Test recording several launches with one call."""
+        self.manager._record_launches("test_app", 3)
+        self.manager._record_launches("test_app", 2)
         
         stats = self.manager.get_stats()
-        self.assertEqual(stats["test_app"]["launches"], 3)
+        self.assertEqual(stats["test_app"]["launches"], 5)
 
 
 class TestConfigManagerAdvanced(unittest.TestCase):
     """Advanced tests for ConfigManager."""
     
+    @classmethod
+    def setUpClass(cls):
+        """Create one temp dir shared by the whole class."""
+        cls.temp_dir = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the shared temp dir."""
+        _remove_temp_dir(cls.temp_dir)
+
     def setUp(self):
         """Set up test fixtures."""
-        self.temp_dir = tempfile.mkdtemp()
+        _clear_temp_dir(self.temp_dir)
         self.config_file = os.path.join(self.temp_dir, "app_config.json")
     
-    def tearDown(self):
-        """Clean up after tests."""
-        import shutil
-        if os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
-    
     def test_auto_detect_apps(self):
         """Test auto-detection of applications."""
         test_config = {
@@ -384,27 +470,23 @@ class TestConfigManagerAdvanced(unittest.TestCase):
             }
         }
         
-        import json
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(test_config, f, ensure_ascii=False)
+        Path(self.config_file).write_text(json.dumps(test_config, ensure_ascii=False), encoding='utf-8')
         
-        import config
         config_patcher = patch('config.CONFIG_FILE', self.config_file)
         config_patcher.start()
         
         try:
-            config._config_manager = None
-            test_config_obj = config.ConfigManager()
+            config_mod._config_manager = None
+            test_config_obj = config_mod.ConfigManager()
             # Автопоиск должен попытаться найти приложение
             self.assertIsNotNone(test_config_obj)
         finally:
             config_patcher.stop()
-            config._config_manager = None
+            config_mod._config_manager = None
     
     def test_expand_path(self):
         """Test path expansion with environment variables."""
-        import config
-        config_obj = config.ConfigManager()
+        config_obj = make_config()
         
         # Тестируем расширение переменных окружения
         test_path = r"%APPDATA%\test.exe"
@@ -413,65 +495,15 @@ class TestConfigManagerAdvanced(unittest.TestCase):
     
     def test_get_all_apps(self):
         """Test getting all apps."""
-        import config
-        config_obj = config.ConfigManager()
+        config_obj = make_config()
         all_apps = config_obj.get_all_apps()
         self.assertIsInstance(all_apps, dict)
         self.assertGreater(len(all_apps), 0)
 
 
-class TestAppManagerAdvanced(unittest.TestCase):
+class TestAppManagerAdvanced(_AppManagerFixtures):
     """Advanced tests for AppManager."""
     
-    def setUp(self):
-        """Set up test fixtures."""
-        import app_manager
-        app_manager._manager = None
-        
-        self.temp_dir = tempfile.mkdtemp()
-        self.pids_file = os.path.join(self.temp_dir, "running_pids.json")
-        self.stats_db = os.path.join(self.temp_dir, "bot_stats.db")
-        
-        if os.path.exists(self.stats_db):
-            os.remove(self.stats_db)
-        
-        self.patcher1 = patch('app_manager.RUNNING_PIDS_FILE', self.pids_file)
-        self.patcher2 = patch('app_manager.STATS_DB_FILE', self.stats_db)
-        self.patcher1.start()
-        self.patcher2.start()
-        
-        mock_config = Mock(spec=ConfigManager)
-        mock_config.get_app_config.return_value = {
-            "name": "Test App",
-            "path": "/test/path.exe",
-            "process_name": "test.exe",
-            "args": []
-        }
-        mock_config.get_all_apps.return_value = {
-            "test_app": {"name": "Test App"}
-        }
-        mock_config.get_app_command.return_value = ["/test/path.exe"]
-        mock_config.get_process_name.return_value = "test.exe"
-        
-        self.config_patcher = patch('app_manager.get_config', return_value=mock_config)
-        self.config_patcher.start()
-        
-        app_manager._manager = None
-        self.manager = AppManager()
-    
-    def tearDown(self):
-        """Clean up after tests."""
-        self.patcher1.stop()
-        self.patcher2.stop()
-        self.config_patcher.stop()
-        
-        import app_manager
-        app_manager._manager = None
-        
-        import shutil
-        if os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
-    
     def test_record_session_end(self):
         """Test recording session end."""
         # Сначала записываем запуск
@@ -484,104 +516,86 @@ class TestAppManagerAdvanced(unittest.TestCase):
         # Время должно быть больше 0 (хотя бы минимальное)
         self.assertGreaterEqual(stats["test_app"]["total_time"], 0)
     
-    def test_get_stats_with_data(self):
-        """Test getting stats with actual data."""
-        # Записываем несколько запусков
-        for _ in range(2):
-            self.manager._record_launch("test_app")
-        
-        stats = self.manager.get_stats()
-        self.assertEqual(stats["test_app"]["launches"], 2)
-        self.assertNotEqual(stats["test_app"]["last_launch"], "никогда")
-    
     def test_close_app_not_running(self):
         """Test closing app that is not running."""
-        # Пытаемся закрыть не запущенное приложение
-        result = self.manager.close_app("test_app")
+        # Пытаемся закрыть не запущенное приложение; taskkill не вызываем по-настоящему
+        with patch('app_manager.subprocess.run',
+                   side_effect=subprocess.CalledProcessError(128, 'taskkill')) as mock_run:
+            result = self.manager.close_app("test_app")
         # Должно вернуть False, так как приложение не запущено
         self.assertFalse(result)
+        mock_run.assert_called_once()
 
 
 class TestConfigManagerComplete(unittest.TestCase):
     """Complete tests for ConfigManager to achieve 100% coverage."""
 
+    @classmethod
+    def setUpClass(cls):
+        """Create one temp dir shared by the whole class."""
+        cls.temp_dir = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the shared temp dir."""
+        _remove_temp_dir(cls.temp_dir)
+
     def setUp(self):
         """Set up test fixtures."""
-        self.temp_dir = tempfile.mkdtemp()
+        _clear_temp_dir(self.temp_dir)
         self.config_file = os.path.join(self.temp_dir, "app_config.json")
-        os.environ['CONFIG_FILE'] = self.config_file
+        self._env_patch = patch.dict(os.environ, {'CONFIG_FILE': self.config_file})
+        self._env_patch.start()
 
     def tearDown(self):
-        """Clean up after tests."""
-        import shutil
-        if os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
+        """Restore the environment."""
+        self._env_patch.stop()
 
     def test_merge_with_defaults(self):
         """Test merging config with defaults."""
-        import config
-        config_patcher = patch('config.CONFIG_FILE', self.config_file)
-        config_patcher.start()
+        config_obj = make_config()
 
-        try:
-            config._config_manager = None
-            config_obj = config.ConfigManager()
-
-            # Создаем частичный конфиг
-            partial_config = {
-                "apps": {
-                    "dota": {
-                        "path": "/custom/path"
-                    }
-                },
-                "settings": {
-                    "rate_limit_seconds": 5
+        # Создаем частичный конфиг
+        partial_config = {
+            "apps": {
+                "dota": {
+                    "path": "/custom/path"
                 }
+            },
+            "settings": {
+                "rate_limit_seconds": 5
             }
+        }
 
-            merged = config_obj._merge_with_defaults(partial_config)
+        merged = config_obj._merge_with_defaults(partial_config)
 
-            # Проверяем что новые настройки применились
-            self.assertEqual(merged["settings"]["rate_limit_seconds"], 5)
-            # Проверяем что старые настройки остались
-            self.assertTrue(merged["settings"]["auto_save_pids"])
-            # Проверяем что новые приложения добавились
-            self.assertIn("dota", merged["apps"])
-            self.assertEqual(merged["apps"]["dota"]["path"], "/custom/path")
-        finally:
-            config_patcher.stop()
-            config._config_manager = None
+        # Проверяем что новые настройки применились
+        self.assertEqual(merged["settings"]["rate_limit_seconds"], 5)
+        # Проверяем что старые настройки остались
+        self.assertTrue(merged["settings"]["auto_save_pids"])
+        # Проверяем что новые приложения добавились
+        self.assertIn("dota", merged["apps"])
+        self.assertEqual(merged["apps"]["dota"]["path"], "/custom/path")
 
     def test_save_config(self):
         """Test saving configuration."""
-        import config
-        config_patcher = patch('config.CONFIG_FILE', self.config_file)
-        config_patcher.start()
-
-        try:
-            config._config_manager = None
-            config_obj = config.ConfigManager()
+        config_obj = make_config()
 
-            # Изменяем конфиг
-            config_obj.config["settings"]["rate_limit_seconds"] = 10
+        # Изменяем конфиг; save_config пишет в config.CONFIG_FILE
+        config_obj.config["settings"]["rate_limit_seconds"] = 10
+        with patch('config.CONFIG_FILE', self.config_file):
             config_obj.save_config()
 
-            # Проверяем что файл создан и содержит изменения
-            self.assertTrue(os.path.exists(self.config_file))
+        # Проверяем что файл создан и содержит изменения
+        self.assertTrue(os.path.exists(self.config_file))
 
-            import json
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                saved_config = json.load(f)
+        saved_config = json.loads(Path(self.config_file).read_text(encoding='utf-8'))
 
-            self.assertEqual(saved_config["settings"]["rate_limit_seconds"], 10)
-        finally:
-            config_patcher.stop()
-            config._config_manager = None
+        self.assertEqual(saved_config["settings"]["rate_limit_seconds"], 10)
 
     def test_find_app_with_wildcard(self):
         """Test finding app with wildcard paths."""
-        import config
-        config_obj = config.ConfigManager()
+        config_obj = make_config()
 
         # Создаем временный файл для тестирования
         test_dir = os.path.join(self.temp_dir, "test_app")
@@ -596,188 +610,81 @@ class TestConfigManagerComplete(unittest.TestCase):
 
     def test_find_app_not_found(self):
         """Test finding app when not found."""
-        import config
-        config_obj = config.ConfigManager()
+        config_obj = make_config()
 
         found = config_obj._find_app(["/nonexistent/path"], "testuser")
         self.assertIsNone(found)
 
     def test_get_app_config(self):
         """Test getting app configuration."""
-        import config
-        config_patcher = patch('config.CONFIG_FILE', self.config_file)
-        config_patcher.start()
-
-        try:
-            config._config_manager = None
-            config_obj = config.ConfigManager()
+        config_obj = make_config()
 
-            # Тестируем получение существующего приложения
-            dota_config = config_obj.get_app_config("dota")
-            self.assertIsNotNone(dota_config)
-            self.assertEqual(dota_config["name"], "Dota 2")
+        # Тестируем получение существующего приложения
+        dota_config = config_obj.get_app_config("dota")
+        self.assertIsNotNone(dota_config)
+        self.assertEqual(dota_config["name"], "Dota 2")
 
-            # Тестируем получение несуществующего приложения
-            nonexistent_config = config_obj.get_app_config("nonexistent")
-            self.assertIsNone(nonexistent_config)
-        finally:
-            config_patcher.stop()
-            config._config_manager = None
+        # Тестируем получение несуществующего приложения
+        nonexistent_config = config_obj.get_app_config("nonexistent")
+        self.assertIsNone(nonexistent_config)
 
     def test_get_process_name(self):
         """Test getting process name for app."""
-        import config
-        config_patcher = patch('config.CONFIG_FILE', self.config_file)
-        config_patcher.start()
-
-        try:
-            config._config_manager = None
-            config_obj = config.ConfigManager()
+        config_obj = make_config()
 
-            # Тестируем получение process name
-            dota_process = config_obj.get_process_name("dota")
-            self.assertEqual(dota_process, "dota2.exe")
+        # Тестируем получение process name
+        dota_process = config_obj.get_process_name("dota")
+        self.assertEqual(dota_process, "dota2.exe")
 
-            # Тестируем для несуществующего приложения
-            nonexistent_process = config_obj.get_process_name("nonexistent")
-            self.assertIsNone(nonexistent_process)
-        finally:
-            config_patcher.stop()
-            config._config_manager = None
+        # Тестируем для несуществующего приложения
+        nonexistent_process = config_obj.get_process_name("nonexistent")
+        self.assertIsNone(nonexistent_process)
 
     def test_update_app_path_success(self):
         """Test updating app path successfully."""
-        import config
-        config_patcher = patch('config.CONFIG_FILE', self.config_file)
-        config_patcher.start()
-
-        try:
-            config._config_manager = None
-            config_obj = config.ConfigManager()
+        config_obj = make_config()
 
-            # Создаем тестовый файл
-            test_path = os.path.join(self.temp_dir, "test.exe")
-            with open(test_path, 'w') as f:
-                f.write("test")
+        # Создаем тестовый файл
+        test_path = os.path.join(self.temp_dir, "test.exe")
+        with open(test_path, 'w') as f:
+            f.write("test")
 
-            # Обновляем путь
+        # Обновляем путь; update_app_path сохраняет конфиг в config.CONFIG_FILE
+        with patch('config.CONFIG_FILE', self.config_file):
             result = config_obj.update_app_path("dota", test_path)
-            self.assertTrue(result)
-            self.assertEqual(config_obj.config["apps"]["dota"]["path"], test_path)
-        finally:
-            config_patcher.stop()
-            config._config_manager = None
+        self.assertTrue(result)
+        self.assertEqual(config_obj.config["apps"]["dota"]["path"], test_path)
 
     def test_update_app_path_invalid(self):
         """Test updating app path with invalid path."""
-        import config
-        config_patcher = patch('config.CONFIG_FILE', self.config_file)
-        config_patcher.start()
+        config_obj = make_config()
 
-        try:
-            config._config_manager = None
-            config_obj = config.ConfigManager()
-
-            # Пытаемся обновить на несуществующий путь
-            result = config_obj.update_app_path("dota", "/nonexistent/path")
-            self.assertFalse(result)
-        finally:
-            config_patcher.stop()
-            config._config_manager = None
+        # Пытаемся обновить на несуществующий путь
+        result = config_obj.update_app_path("dota", "/nonexistent/path")
+        self.assertFalse(result)
 
     def test_update_app_path_nonexistent_app(self):
         """Test updating path for nonexistent app."""
-        import config
-        config_patcher = patch('config.CONFIG_FILE', self.config_file)
-        config_patcher.start()
+        config_obj = make_config()
 
-        try:
-            config._config_manager = None
-            config_obj = config.ConfigManager()
-
-            result = config_obj.update_app_path("nonexistent", "/some/path")
-            self.assertFalse(result)
-        finally:
-            config_patcher.stop()
-            config._config_manager = None
+        result = config_obj.update_app_path("nonexistent", "/some/path")
+        self.assertFalse(result)
 
     def test_get_setting(self):
         """Test getting settings."""
-        import config
-        config_patcher = patch('config.CONFIG_FILE', self.config_file)
-        config_patcher.start()
-
-        try:
-            config._config_manager = None
-            config_obj = config.ConfigManager()
-
-            # Тестируем существующую настройку
-            rate_limit = config_obj.get_setting("rate_limit_seconds")
-            self.assertEqual(rate_limit, 2)
-
-            # Тестируем несуществующую настройку с default
-            nonexistent = config_obj.get_setting("nonexistent", "default")
-            self.assertEqual(nonexistent, "default")
-
-            # Тестируем несуществующую настройку без default
-            nonexistent_no_default = config_obj.get_setting("nonexistent")
-            self.assertIsNone(nonexistent_no_default)
-        finally:
-            config_patcher.stop()
-            config._config_manager = None
-
+        config_obj = make_config()
 
-class TestSingleton(unittest.TestCase):
-    """Tests for singleton pattern in config module."""
-
-    def setUp(self):
-        """Set up test fixtures."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.config_file = os.path.join(self.temp_dir, "app_config.json")
-
-    def tearDown(self):
-        """Clean up after tests."""
-        import shutil
-        if os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
-
-    def test_get_config_singleton(self):
-        """Test that get_config returns singleton instance."""
-        import config
-        config_patcher = patch('config.CONFIG_FILE', self.config_file)
-        config_patcher.start()
-
-        try:
-            # Сбрасываем singleton
-            config._config_manager = None
-
-            # Получаем первый экземпляр
-            config1 = config.get_config()
-            # Получаем второй экземпляр
-            config2 = config.get_config()
-
-            # Проверяем что это один и тот же объект
-            self.assertIs(config1, config2)
-            self.assertIsInstance(config1, config.ConfigManager)
-        finally:
-            config_patcher.stop()
-            config._config_manager = None
-
-
-class TestConfigManagerCompleteCoverage(unittest.TestCase):
-    """Complete tests for ConfigManager to achieve 100% coverage."""
+        # Тестируем существующую настройку
+        rate_limit = config_obj.get_setting("rate_limit_seconds")
+        self.assertEqual(rate_limit, 2)
 
-    def setUp(self):
-        """Set up test fixtures."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.config_file = os.path.join(self.temp_dir, "app_config.json")
-        os.environ['CONFIG_FILE'] = self.config_file
+        # Тестируем несуществующую настройку с default
+        nonexistent = config_obj.get_setting("nonexistent", "default")
+        self.assertEqual(nonexistent, "default")
 
-    def tearDown(self):
-        """Clean up after tests."""
-        import shutil
-        if os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
+        # Тестируем несуществующую настройку без default
+        nonexistent_no_default = config_obj.get_setting("nonexistent")
+        self.assertIsNone(nonexistent_no_default)
 
     def test_load_config_json_error(self):
         """Test JSON decode error handling."""
@@ -785,100 +692,62 @@ class TestConfigManagerCompleteCoverage(unittest.TestCase):
         with open(self.config_file, 'w') as f:
             f.write("{ invalid json }")
 
-        import config
         config_patcher = patch('config.CONFIG_FILE', self.config_file)
         config_patcher.start()
 
         try:
-            config._config_manager = None
-            config_obj = config.ConfigManager()
+            config_mod._config_manager = None
+            config_obj = config_mod.ConfigManager()
 
             # Должен загрузить конфигурацию по умолчанию
             self.assertIsNotNone(config_obj.config)
             self.assertIn("apps", config_obj.config)
         finally:
             config_patcher.stop()
-            config._config_manager = None
+            config_mod._config_manager = None
 
     def test_save_config_error(self):
         """Test error handling in save_config."""
-        import config
-        config_patcher = patch('config.CONFIG_FILE', self.config_file)
-        config_patcher.start()
-
-        try:
-            config._config_manager = None
-            config_obj = config.ConfigManager()
+        config_obj = make_config()
 
-            # Мокаем open чтобы он выбрасывал исключение
-            with patch('builtins.open', side_effect=Exception("File error")):
-                # Должен обработать ошибку без исключения
-                config_obj.save_config()
-        finally:
-            config_patcher.stop()
-            config._config_manager = None
+        # Мокаем open чтобы он выбрасывал исключение
+        with patch('builtins.open', side_effect=Exception("File error")):
+            # Должен обработать ошибку без исключения
+            config_obj.save_config()
 
     def test_get_app_command_no_config(self):
         """Test get_app_command when app config is missing."""
-        import config
-        config_patcher = patch('config.CONFIG_FILE', self.config_file)
-        config_patcher.start()
-
-        try:
-            config._config_manager = None
-            config_obj = config.ConfigManager()
+        config_obj = make_config()
 
-            # Приложение без конфигурации
-            result = config_obj.get_app_command("nonexistent")
-            self.assertIsNone(result)
-        finally:
-            config_patcher.stop()
-            config._config_manager = None
+        # Приложение без конфигурации
+        result = config_obj.get_app_command("nonexistent")
+        self.assertIsNone(result)
 
     def test_get_app_command_no_path(self):
         """Test get_app_command when path is missing."""
-        import config
-        config_patcher = patch('config.CONFIG_FILE', self.config_file)
-        config_patcher.start()
-
-        try:
-            config._config_manager = None
-            config_obj = config.ConfigManager()
+        config_obj = make_config()
 
-            # Изменяем конфиг чтобы убрать путь
-            config_obj.config["apps"]["dota"]["path"] = ""
-            result = config_obj.get_app_command("dota")
-            self.assertIsNone(result)
-        finally:
-            config_patcher.stop()
-            config._config_manager = None
+        # Изменяем конфиг чтобы убрать путь
+        config_obj.config["apps"]["dota"]["path"] = ""
+        result = config_obj.get_app_command("dota")
+        self.assertIsNone(result)
 
     def test_get_app_command_path_not_exists(self):
         """Test get_app_command when path doesn't exist."""
-        import config
-        config_patcher = patch('config.CONFIG_FILE', self.config_file)
-        config_patcher.start()
-
-        try:
-            config._config_manager = None
-            config_obj = config.ConfigManager()
+        config_obj = make_config()
 
-            # Устанавливаем несуществующий путь
-            config_obj.config["apps"]["dota"]["path"] = "/nonexistent/path.exe"
-            result = config_obj.get_app_command("dota")
-            self.assertIsNone(result)
-        finally:
-            config_patcher.stop()
-            config._config_manager = None
+        # Устанавливаем несуществующий путь
+        config_obj.config["apps"]["dota"]["path"] = "/nonexistent/path.exe"
+        result = config_obj.get_app_command("dota")
+        self.assertIsNone(result)
 
     def test_main_block_execution(self):
         """Test execution of main block."""
-        import config
         config_patcher = patch('config.CONFIG_FILE', self.config_file)
         config_patcher.start()
 
         try:
-            config._config_manager = None
+            config_mod._config_manager = None
 
             # Мокаем print и get_config
             with patch('builtins.print') as mock_print:
@@ -888,75 +757,122 @@ class TestConfigManagerCompleteCoverage(unittest.TestCase):
                     mock_config.get_app_command.return_value = ["/test"]
                     mock_get_config.return_value = mock_config
 
-                    # Импортируем как main модуль
-                    import sys
-                    old_argv = sys.argv
-                    sys.argv = ['config.py']
-
-                    try:
-                        # Выполняем main блок
-                        exec(open('config.py').read())
-                    finally:
-                        sys.argv = old_argv
+                    # Выполняем main блок в пространстве имён модуля, где
+                    # get_config уже подменён, без повторного импорта классов
+                    exec(_CONFIG_MAIN_CODE, {**vars(config_mod), '__name__': '__main__'})
 
                     # Проверяем что print был вызван
                     mock_print.assert_called()
         finally:
             config_patcher.stop()
-            config._config_manager = None
+            config_mod._config_manager = None
 
 
-class TestAppManagerComplete(unittest.TestCase):
-    """Complete tests for AppManager to achieve 100% coverage."""
+class TestSingleton(unittest.TestCase):
+    """Tests for singleton pattern in config module."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Create one temp dir shared by the whole class."""
+        cls.temp_dir = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the shared temp dir."""
+        _remove_temp_dir(cls.temp_dir)
 
     def setUp(self):
         """Set up test fixtures."""
-        import app_manager
-        app_manager._manager = None
+        _clear_temp_dir(self.temp_dir)
+        self.config_file = os.path.join(self.temp_dir, "app_config.json")
 
-        self.temp_dir = tempfile.mkdtemp()
-        self.pids_file = os.path.join(self.temp_dir, "running_pids.json")
-        self.stats_db = os.path.join(self.temp_dir, "bot_stats.db")
+    def test_get_config_singleton(self):
+        """Test that get_config returns singleton instance."""
+        config_patcher = patch('config.CONFIG_FILE', self.config_file)
+        config_patcher.start()
 
-        if os.path.exists(self.stats_db):
-            os.remove(self.stats_db)
+        try:
+            # Сбрасываем singleton
+            config_mod._config_manager = None
 
-        self.patcher1 = patch('app_manager.RUNNING_PIDS_FILE', self.pids_file)
-        self.patcher2 = patch('app_manager.STATS_DB_FILE', self.stats_db)
-        self.patcher1.start()
-        self.patcher2.start()
+            # Получаем первый экземпляр
+            config1 = config_mod.get_config()
+            # Получаем второй экземпляр
+            config2 = config_mod.get_config()
 
-        mock_config = Mock(spec=ConfigManager)
-        mock_config.get_app_config.return_value = {
-            "name": "Test App",
-            "path": "/test/path.exe",
-            "process_name": "test.exe",
-            "args": []
-        }
-        mock_config.get_all_apps.return_value = {
-            "test_app": {"name": "Test App"}
-        }
-        mock_config.get_app_command.return_value = ["/test/path.exe"]
-        mock_config.get_process_name.return_value = "test.exe"
+            # Проверяем что это один и тот же объект
+            self.assertIs(config1, config2)
+            self.assertIsInstance(config1, config_mod.ConfigManager)
+        finally:
+            config_patcher.stop()
+            config_mod._config_manager = None
+
+
+class TestAppManagerComplete(unittest.TestCase):
+    """Complete tests for AppManager to achieve 100% coverage."""
+
+    # Исключения матрицы close_app создаются один раз на класс
+    _CPE = subprocess.CalledProcessError(1, 'taskkill')
+    _TO = subprocess.TimeoutExpired('taskkill', 10)
+    _ERR = Exception("Test error")
+
+    @classmethod
+    def setUpClass(cls):
+        """Create the class temp dir and patch module paths and get_config once."""
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.addClassCleanup(_remove_temp_dir, cls.temp_dir)
+        cls.pids_file = os.path.join(cls.temp_dir, "running_pids.json")
+        # Общая БД в памяти живёт, пока открыто хоть одно соединение менеджера;
+        # файловая нужна только тесту миграции
+        cls.stats_db = "file:appmgr_test?mode=memory&cache=shared"
+        cls.disk_db = os.path.join(cls.temp_dir, "bot_stats.db")
+
+        # Шаблон БД со старой структурой собирается один раз и копируется в тест
+        cls._wrong_schema_db = os.path.join(cls.temp_dir, "wrong_schema.db")
+        with closing(sqlite3.connect(cls._wrong_schema_db)) as conn:
+            conn.executescript("CREATE TABLE app_stats (app_name TEXT, wrong_column INTEGER);")
+
+        # Заглушки собираются один раз на класс и не меняются тестами
+        stub_config = cls._stub_config = _StubConfig(
+            _AppManagerFixtures.app_config, _AppManagerFixtures.all_apps)
+        cls._broken_conn = Mock(**{'cursor.side_effect': Exception("DB Error")})
+
+        # Патчи ставятся один раз на класс: декоратор класса не покрыл бы setUp,
+        # где создаётся менеджер, а снимает их addClassCleanup даже при сбое
+        patcher = patch.multiple(
+            'app_manager',
+            RUNNING_PIDS_FILE=cls.pids_file,
+            STATS_DB_FILE=cls.stats_db,
+            get_config=lambda: stub_config,
+        )
+        patcher.start()
+        cls.addClassCleanup(patcher.stop)
 
-        self.config_patcher = patch('app_manager.get_config', return_value=mock_config)
-        self.config_patcher.start()
+        # Общую БД в памяти AppManager открывает через URI только в тестах
+        connect_patcher = patch('app_manager.sqlite3.connect', _connect_uri)
+        connect_patcher.start()
+        cls.addClassCleanup(connect_patcher.stop)
 
-        app_manager._manager = None
+    def setUp(self):
+        """Set up test fixtures."""
+        # Вместо очистки каталога обнуляем PID-файл и сбрасываем таблицу статистики
+        Path(self.pids_file).write_text('{}', encoding='utf-8')
+        with closing(sqlite3.connect(self.stats_db, uri=True)) as conn:
+            conn.execute("DROP TABLE IF EXISTS app_stats")
+            conn.commit()
+        app_manager_mod._manager = None
         self.manager = AppManager()
 
     def tearDown(self):
         """Clean up after tests."""
-        self.patcher1.stop()
-        self.patcher2.stop()
-        self.config_patcher.stop()
-
-        import app_manager
-        app_manager._manager = None
+        self.manager.close()
+        if app_manager_mod._manager is not None:
+            app_manager_mod._manager.close()
+        app_manager_mod._manager = None
 
-        import shutil
-        if os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
+    def _track_pid(self):
+        """Pretend test_app is running under a known PID."""
+        self.manager.running_pids["test_app"] = 12345
 
     def test_get_process_name(self):
         """Test getting process name from config."""
@@ -968,7 +884,7 @@ class TestAppManagerComplete(unittest.TestCase):
         # Устанавливаем PID для несуществующего процесса
         self.manager.running_pids["test_app"] = 999999  # Несуществующий PID
 
-        with patch('app_manager.HAS_PSUTIL', True):
+        with swap(app_manager_mod, HAS_PSUTIL=True):
             result = self.manager.is_running("test_app")
             # PID должен быть удален
             self.assertNotIn("test_app", self.manager.running_pids)
@@ -976,22 +892,21 @@ class TestAppManagerComplete(unittest.TestCase):
 
     def test_launch_app_invalid_command(self):
         """Test launching app with invalid command."""
-        self.manager.config.get_app_command.return_value = None
-
-        result = self.manager.launch_app("test_app")
+        with patch.object(self.manager.config, 'get_app_command', return_value=None):
+            result = self.manager.launch_app("test_app")
         self.assertFalse(result)
 
     def test_close_app_by_name_fallback(self):
         """Test closing app by name when PID method fails."""
         # Устанавливаем PID чтобы первый блок выполнился
-        self.manager.running_pids["test_app"] = 12345
+        self._track_pid()
 
         # Мокаем taskkill по PID чтобы он провалился
         with patch('app_manager.subprocess.run') as mock_run:
             # Первый вызов (по PID) проваливается
             # Второй вызов (по имени) должен сработать
             mock_run.side_effect = [
-                subprocess.CalledProcessError(1, 'taskkill'),  # PID method fails
+                self._CPE,  # PID method fails
                 Mock(returncode=0)  # Name method succeeds
             ]
 
@@ -1001,62 +916,40 @@ class TestAppManagerComplete(unittest.TestCase):
 
     def test_psutil_import_error(self):
         """Test behavior when psutil is not available."""
-        # Мокаем отсутствие psutil
-        with patch('app_manager.HAS_PSUTIL', False):
-            # Создаем новый менеджер
-            import app_manager
-            app_manager._manager = None
-
-            # Мокаем config
-            mock_config = Mock()
-            mock_config.get_app_config.return_value = {"name": "Test", "process_name": "test.exe"}
-            mock_config.get_all_apps.return_value = {"test_app": {}}
-            mock_config.get_app_command.return_value = ["/test/path.exe"]
-            mock_config.get_process_name.return_value = "test.exe"
-
-            with patch('app_manager.get_config', return_value=mock_config):
-                manager = AppManager()
-
-                # Тестируем is_running без psutil
-                with patch('app_manager.subprocess.run') as mock_run:
-                    mock_run.return_value = Mock(stdout="12345 test.exe")
-                    result = manager.is_running("test_app")
-                    self.assertIsInstance(result, bool)
+        # Статичная заглушка config: вызовы никто не проверяет
+        stub_config = _StubConfig({"name": "Test", "process_name": "test.exe"}, {"test_app": {}})
+        fake_run = lambda *args, **kwargs: SimpleNamespace(stdout="12345 test.exe")
+        app_manager_mod._manager = None
+
+        # Мокаем отсутствие psutil и tasklist
+        with swap(app_manager_mod, HAS_PSUTIL=False, get_config=lambda: stub_config), \
+                swap(app_manager_mod.subprocess, run=fake_run):
+            manager = AppManager()
+            self.addCleanup(manager.close)
+
+            # Тестируем is_running без psutil
+            result = manager.is_running("test_app")
+            self.assertIsInstance(result, bool)
 
     def test_db_migration_on_wrong_structure(self):
         """Test database migration when table structure is wrong."""
-        # Создаем БД с неправильной структурой
-        conn = sqlite3.connect(self.stats_db)
-        cursor = conn.cursor()
-
-        # Удаляем существующую таблицу и создаем с неправильными колонками
-        cursor.execute("DROP TABLE IF EXISTS app_stats")
-        cursor.execute("""
-            CREATE TABLE app_stats (
-                app_name TEXT,
-                wrong_column INTEGER
-            )
-        """)
-        conn.commit()
-        conn.close()
+        # Берем БД с неправильной структурой из шаблона класса
+        shutil.copyfile(self._wrong_schema_db, self.disk_db)
 
         # Создаем новый менеджер - он должен мигрировать БД
         AppManager._manager = None
-        manager = AppManager()
+        with swap(app_manager_mod, STATS_DB_FILE=self.disk_db):
+            manager = AppManager()
+        self.addCleanup(manager.close)
 
         # Проверяем что таблица была пересоздана правильно
-        conn = sqlite3.connect(self.stats_db)
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA table_info(app_stats)")
-        columns = cursor.fetchall()
+        columns = manager._conn.execute("PRAGMA table_info(app_stats)").fetchall()
         column_names = [col[1] for col in columns]
 
         expected_columns = ['app_name', 'launches', 'total_time', 'last_launch', 'last_session_start']
         for col in expected_columns:
             self.assertIn(col, column_names)
 
-        conn.close()
-
     def test_db_init_error_handling(self):
         """Test error handling during database initialization."""
         # Мокаем sqlite3.connect чтобы он выбрасывал исключение
@@ -1069,17 +962,16 @@ class TestAppManagerComplete(unittest.TestCase):
 
     def test_is_running_tasklist_fallback(self):
         """Test is_running with tasklist fallback when psutil available."""
-        self.manager.running_pids["test_app"] = 12345
+        self._track_pid()
 
-        with patch('app_manager.HAS_PSUTIL', True):
-            # Мокаем psutil.pid_exists как False, чтобы перейти к tasklist
-            with patch('app_manager.psutil.pid_exists', return_value=False):
-                with patch('app_manager.subprocess.run') as mock_run:
-                    mock_run.return_value = Mock(stdout="12345 test.exe", returncode=0)
-
-                    result = self.manager.is_running("test_app")
-                    # PID должен быть удален из running_pids
-                    self.assertNotIn("test_app", self.manager.running_pids)
+        fake_run = lambda *args, **kwargs: SimpleNamespace(stdout="12345 test.exe", returncode=0)
+        # Мокаем psutil.pid_exists как False, чтобы перейти к tasklist
+        with swap(app_manager_mod, HAS_PSUTIL=True), \
+                swap(app_manager_mod.psutil, pid_exists=lambda pid: False), \
+                swap(app_manager_mod.subprocess, run=fake_run):
+            result = self.manager.is_running("test_app")
+            # PID должен быть удален из running_pids
+            self.assertNotIn("test_app", self.manager.running_pids)
 
     def test_is_running_psutil_update_pid(self):
         """Test PID update when process found via psutil."""
@@ -1088,13 +980,13 @@ class TestAppManagerComplete(unittest.TestCase):
         mock_proc.pid = 99999
         mock_proc.info = {'name': 'test.exe'}
 
-        with patch('app_manager.HAS_PSUTIL', True):
-            with patch('app_manager.psutil.process_iter', return_value=[mock_proc]):
-                result = self.manager.is_running("test_app")
+        with swap(app_manager_mod, HAS_PSUTIL=True), \
+                swap(app_manager_mod.psutil, process_iter=lambda *a, **k: iter((mock_proc,))):
+            result = self.manager.is_running("test_app")
 
-                # PID должен быть обновлен
-                self.assertEqual(self.manager.running_pids["test_app"], 99999)
-                self.assertTrue(result)
+            # PID должен быть обновлен
+            self.assertEqual(self.manager.running_pids["test_app"], 99999)
+            self.assertTrue(result)
 
     def test_launch_app_already_running(self):
         """Test launching app that is already running."""
@@ -1105,41 +997,40 @@ class TestAppManagerComplete(unittest.TestCase):
     def test_launch_app_exceptions(self):
         """Test various exceptions during app launch."""
         # Test FileNotFoundError
-        with patch('os.path.exists', return_value=True):
-            with patch('app_manager.subprocess.Popen', side_effect=FileNotFoundError):
-                result = self.manager.launch_app("test_app")
-                self.assertFalse(result)
+        with swap(os.path, exists=lambda path: True), \
+                swap(app_manager_mod.subprocess, Popen=_raiser(FileNotFoundError)):
+            result = self.manager.launch_app("test_app")
+            self.assertFalse(result)
 
         # Test PermissionError
-        with patch('os.path.exists', return_value=True):
-            with patch('app_manager.subprocess.Popen', side_effect=PermissionError):
-                result = self.manager.launch_app("test_app")
-                self.assertFalse(result)
+        with swap(os.path, exists=lambda path: True), \
+                swap(app_manager_mod.subprocess, Popen=_raiser(PermissionError)):
+            result = self.manager.launch_app("test_app")
+            self.assertFalse(result)
 
         # Test general Exception
-        with patch('os.path.exists', return_value=True):
-            with patch('app_manager.subprocess.Popen', side_effect=Exception("Test error")):
-                result = self.manager.launch_app("test_app")
-                self.assertFalse(result)
+        with swap(os.path, exists=lambda path: True), \
+                swap(app_manager_mod.subprocess, Popen=_raiser(self._ERR)):
+            result = self.manager.launch_app("test_app")
+            self.assertFalse(result)
 
     def test_close_app_exceptions_pid_method(self):
         """Test exceptions in close_app PID method."""
-        self.manager.running_pids["test_app"] = 12345
-
         # Test timeout
-        with patch('app_manager.subprocess.run', side_effect=subprocess.TimeoutExpired('taskkill', 10)):
+        self._track_pid()
+        with swap(app_manager_mod.subprocess, run=_raiser(self._TO)):
             result = self.manager.close_app("test_app")
             self.assertFalse(result)
 
         # Test CalledProcessError
-        self.manager.running_pids["test_app"] = 12345
-        with patch('app_manager.subprocess.run', side_effect=subprocess.CalledProcessError(1, 'taskkill')):
+        self._track_pid()
+        with swap(app_manager_mod.subprocess, run=_raiser(self._CPE)):
             result = self.manager.close_app("test_app")
             self.assertFalse(result)
 
         # Test general exception
-        self.manager.running_pids["test_app"] = 12345
-        with patch('app_manager.subprocess.run', side_effect=Exception("Test error")):
+        self._track_pid()
+        with swap(app_manager_mod.subprocess, run=_raiser(self._ERR)):
             result = self.manager.close_app("test_app")
             self.assertFalse(result)
 
@@ -1147,40 +1038,40 @@ class TestAppManagerComplete(unittest.TestCase):
         """Test exceptions in close_app name method."""
         # Test timeout
         with patch('app_manager.subprocess.run') as mock_run:
-            mock_run.side_effect = [subprocess.CalledProcessError(1, 'taskkill'), subprocess.TimeoutExpired('taskkill', 10)]
+            mock_run.side_effect = [self._CPE, self._TO]
             result = self.manager.close_app("test_app")
             self.assertFalse(result)
 
         # Test CalledProcessError
         with patch('app_manager.subprocess.run') as mock_run:
-            mock_run.side_effect = [subprocess.CalledProcessError(1, 'taskkill'), subprocess.CalledProcessError(1, 'taskkill')]
+            mock_run.side_effect = [self._CPE, self._CPE]
             result = self.manager.close_app("test_app")
             self.assertFalse(result)
 
         # Test general exception
         with patch('app_manager.subprocess.run') as mock_run:
-            mock_run.side_effect = [subprocess.CalledProcessError(1, 'taskkill'), Exception("Test error")]
+            mock_run.side_effect = [self._CPE, self._ERR]
             result = self.manager.close_app("test_app")
             self.assertFalse(result)
 
     def test_record_launch_db_error(self):
         """Test error handling in _record_launch."""
         # Мокаем ошибку БД
-        with patch('app_manager.sqlite3.connect', side_effect=Exception("DB Error")):
+        with patch.object(self.manager, '_conn', self._broken_conn):
             # Должен обработать ошибку без исключения
             self.manager._record_launch("test_app")
 
     def test_record_session_end_db_error(self):
         """Test error handling in _record_session_end."""
         # Мокаем ошибку БД
-        with patch('app_manager.sqlite3.connect', side_effect=Exception("DB Error")):
+        with patch.object(self.manager, '_conn', self._broken_conn):
             # Должен обработать ошибку без исключения
             self.manager._record_session_end("test_app")
 
     def test_get_stats_db_error(self):
         """Test error handling in get_stats."""
         # Мокаем ошибку БД
-        with patch('app_manager.sqlite3.connect', side_effect=Exception("DB Error")):
+        with patch.object(self.manager, '_conn', self._broken_conn):
             stats = self.manager.get_stats()
             # Должен вернуть fallback статистику
             self.assertIsInstance(stats, dict)
@@ -1189,13 +1080,12 @@ class TestAppManagerComplete(unittest.TestCase):
     def test_get_manager_singleton(self):
         """Test get_manager singleton function."""
         # Сбрасываем singleton
-        import app_manager
-        app_manager._manager = None
+        app_manager_mod._manager = None
 
         # Получаем первый экземпляр
-        manager1 = app_manager.get_manager()
+        manager1 = app_manager_mod.get_manager()
         # Получаем второй экземпляр
-        manager2 = app_manager.get_manager()
+        manager2 = app_manager_mod.get_manager()
 
         # Проверяем что это один и тот же объект
         self.assertIs(manager1, manager2)
@@ -1203,35 +1093,31 @@ class TestAppManagerComplete(unittest.TestCase):
 
     def test_deprecated_functions(self):
         """Test deprecated compatibility functions."""
-        import app_manager
-
-        # Test load_pids
-        app_manager.load_pids()
-
-        # Test save_pids
-        app_manager.save_pids()
-
-        # Test is_running
-        result = app_manager.is_running("test_app")
-        self.assertIsInstance(result, bool)
-
-        # Test launch_app
-        result = app_manager.launch_app("test_app")
-        self.assertIsInstance(result, bool)
-
-        # Test close_app
-        result = app_manager.close_app("test_app")
-        self.assertIsInstance(result, bool)
+        # Синглтон создаем один раз, дальше все обертки работают через него
+        manager = app_manager_mod.get_manager()
+
+        expected = {
+            app_manager_mod.load_pids: type(None),
+            app_manager_mod.save_pids: type(None),
+            app_manager_mod.is_running: bool,
+            app_manager_mod.launch_app: bool,
+            app_manager_mod.close_app: bool,
+            app_manager_mod.close_all_apps: list,
+        }
+        # taskkill/tasklist подменяем, чтобы обертки не запускали процессы
+        with patch('app_manager.subprocess.run', side_effect=self._CPE):
+            for fn, expected_type in expected.items():
+                with self.subTest(fn=fn.__name__):
+                    result = fn("test_app") if fn.__code__.co_argcount else fn()
+                    self.assertIsInstance(result, expected_type)
 
-        # Test close_all_apps
-        result = app_manager.close_all_apps()
-        self.assertIsInstance(result, list)
+        self.assertIs(app_manager_mod.get_manager(), manager)
 
     def test_close_app_with_taskkill(self):
         """Test closing app using taskkill fallback."""
-        self.manager.running_pids["test_app"] = 12345
+        self._track_pid()
 
-        with patch('app_manager.HAS_PSUTIL', False):
+        with swap(app_manager_mod, HAS_PSUTIL=False):
             with patch('app_manager.subprocess.run') as mock_run:
                 mock_run.return_value = Mock(returncode=0)
                 result = self.manager.close_app("test_app")
@@ -1239,18 +1125,131 @@ class TestAppManagerComplete(unittest.TestCase):
                 mock_run.assert_called_once()
 
 
+class TestVersionManager(unittest.TestCase):
+    """Tests for batched releases in version_manager."""
+
+    README = (
+        "![Version](https://img.shields.io/badge/version-3.0.1-blue)\n\n"
+        "**Версия:** 3.0.1\n\n"
+        "**Всего тестов:** 10 ✅\n"
+    )
+    CHANGELOG = "# 📋 Changelog\n\n## [3.0.1] - 2024-01-01 - Author\n\n### 🎯 Added\n- first\n\n"
+    SPECS = [
+        {'bump_type': 'minor', 'changes': {'added': ['feature'], 'docs': ['guide']}, 'description': 'big'},
+        {'changes': {'fixed': ['bug']}, 'test_count': 99, 'coverage': 77},
+        {'bump_type': 'major', 'author': 'Someone'},
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        """Create one temp dir shared by the whole class."""
+        cls.temp_dir = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the shared temp dir."""
+        _remove_temp_dir(cls.temp_dir)
+
+    def setUp(self):
+        """Set up test fixtures."""
+        _clear_temp_dir(self.temp_dir)
+
+    def make_manager(self, name):
+        """Create a VersionManager working on its own README and CHANGELOG copies."""
+        root = Path(self.temp_dir) / name
+        root.mkdir()
+        (root / "README.md").write_text(self.README, encoding='utf-8')
+        (root / "CHANGELOG.md").write_text(self.CHANGELOG, encoding='utf-8')
+        vm = VersionManager()
+        vm.readme_path = root / "README.md"
+        vm.changelog_path = root / "CHANGELOG.md"
+        return vm
+
+    def test_create_releases_matches_sequential(self):
+        """Test create_releases writes the same files as repeated create_release."""
+        sequential = self.make_manager("sequential")
+        batched = self.make_manager("batched")
+
+        with redirect_stdout(io.StringIO()):
+            expected = [sequential.create_release(**spec) for spec in self.SPECS]
+            versions = batched.create_releases(self.SPECS)
+
+        self.assertEqual(versions, ['3.1.0', '3.1.1', '4.0.0'])
+        self.assertEqual(versions, expected)
+        for name in ("README.md", "CHANGELOG.md"):
+            with self.subTest(name):
+                self.assertEqual((batched.readme_path.parent / name).read_text(encoding='utf-8'),
+                                 (sequential.readme_path.parent / name).read_text(encoding='utf-8'))
+        self.assertEqual(batched.get_current_version(), '4.0.0')
+
+    def test_create_releases_error_keeps_files_and_cache(self):
+        """Test a failing spec leaves files and the cached version untouched."""
+        vm = self.make_manager("failed")
+
+        with self.assertRaises(ValueError):
+            vm.create_releases([{'bump_type': 'minor'}, {'bump_type': 'huge'}])
+
+        self.assertEqual(vm.readme_path.read_text(encoding='utf-8'), self.README)
+        self.assertEqual(vm.changelog_path.read_text(encoding='utf-8'), self.CHANGELOG)
+        self.assertEqual(vm.get_current_version(), '3.0.1')
+        self.assertEqual(vm.bump_version(), '3.0.2')
+
+    def test_atomic_write_removes_temp_file_on_error(self):
+        """Test _atomic_write leaves no temp file behind when the replace fails."""
+        vm = self.make_manager("atomic")
+
+        with patch('version_manager.os.replace', side_effect=OSError("busy")), \
+             self.assertRaises(OSError):
+            VersionManager._atomic_write(vm.readme_path, "new")
+
+        self.assertEqual(sorted(os.listdir(vm.readme_path.parent)), ["CHANGELOG.md", "README.md"])
+        self.assertEqual(vm.readme_path.read_text(encoding='utf-8'), self.README)
+
+    def test_batch_releases_cli(self):
+        """Test --batch-releases applies every release from a JSON file."""
+        vm = self.make_manager("cli")
+        specs_file = Path(self.temp_dir) / "specs.json"
+        specs_file.write_text(json.dumps(self.SPECS[:2]), encoding='utf-8')
+
+        argv = ['version_manager.py', '--batch-releases', str(specs_file)]
+        with patch.multiple(version_manager_mod, _README_PATH=vm.readme_path, _CHANGELOG_PATH=vm.changelog_path), \
+             patch.object(sys, 'argv', argv), redirect_stdout(io.StringIO()) as out:
+            version_manager_mod.main()
+
+        self.assertIn("3.1.0, 3.1.1", out.getvalue())
+        self.assertIn("version-3.1.1-blue", vm.readme_path.read_text(encoding='utf-8'))
+        self.assertEqual(vm.changelog_path.read_text(encoding='utf-8').count("## ["), 3)
+
+    def test_batch_releases_cli_rejects_command(self):
+        """Test --batch-releases cannot be combined with a positional command."""
+        vm = self.make_manager("cli_command")
+
+        argv = ['version_manager.py', 'bump', '--batch-releases', 'specs.json']
+        with patch.object(sys, 'argv', argv), redirect_stderr(io.StringIO()), \
+             self.assertRaises(SystemExit) as ctx:
+            version_manager_mod.main()
+
+        self.assertEqual(ctx.exception.code, 2)
+        self.assertEqual(vm.readme_path.read_text(encoding='utf-8'), self.README)
+
+
 class TestBotFunctions(unittest.TestCase):
     """Tests for bot utility functions."""
 
+    @classmethod
+    def setUpClass(cls):
+        """Patch the bot environment once for the whole class."""
+        # Окружение одно на все тесты класса
+        cls.env_patcher = patch.dict(os.environ, _BOT_ENV)
+        cls.env_patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Restore the environment."""
+        cls.env_patcher.stop()
+
     def setUp(self):
         """Set up test fixtures."""
-        # Мокаем переменные окружения
-        self.env_patcher = patch.dict(os.environ, {
-            'TELEGRAM_BOT_TOKEN': 'test_token_123',
-            'ADMIN_ID': '123456789'
-        })
-        self.env_patcher.start()
-
         # Мокаем импорты
         self.bot_imports = patch.multiple(
             'bot',
@@ -1261,16 +1260,10 @@ class TestBotFunctions(unittest.TestCase):
 
     def tearDown(self):
         """Clean up after tests."""
-        self.env_patcher.stop()
         self.bot_imports.stop()
 
     def test_get_user(self):
         """Test user data management."""
-        # Импортируем после моков
-        import sys
-        if 'bot' in sys.modules:
-            del sys.modules['bot']
-
         # Мокаем только нужные части
         with patch('bot.ADMIN_ID', 123456789):
             # Не можем напрямую тестировать из-за зависимостей
@@ -1284,216 +1277,62 @@ class TestBotFunctions(unittest.TestCase):
         self.assertTrue(True)  # Placeholder для будущих тестов
 
 
-class TestBotCore(unittest.IsolatedAsyncioTestCase):
-    """Tests for bot core functionality."""
-
-    def setUp(self):
-        """Set up test fixtures."""
-        self.env_patcher = patch.dict(os.environ, {
-            'TELEGRAM_BOT_TOKEN': 'test_token_123',
-            'ADMIN_ID': '123456789'
-        })
-        self.env_patcher.start()
-
-    def tearDown(self):
-        """Clean up after tests."""
-        self.env_patcher.stop()
-
-    @patch('bot.get_manager')
-    @patch('bot.reply_log')
-    async def test_handle_message_help_command(self, mock_reply_log, mock_get_manager):
-        """Test handling help command."""
-        # Мокаем Update и Message
-        mock_message = Mock()
-        mock_message.text = "хелп"
-
-        mock_user = Mock()
-        mock_user.id = 123456789  # ADMIN_ID
-
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_user = mock_user
+def _make_reply(text=None):
+    """Build a message stub whose reply_text is an awaitable mock."""
+    return SimpleNamespace(text=text, reply_text=AsyncMock())
 
-        mock_context = Mock()
 
-        # Импортируем функцию после моков
-        from bot import handle_message
+def _make_update(text, uid=123456789):
+    """Build a lightweight Update stub carrying a text message from user uid."""
+    return SimpleNamespace(message=_make_reply(text), effective_user=SimpleNamespace(id=uid))
 
-        await handle_message(mock_update, mock_context)
 
-        # Проверяем что reply_log был вызван
-        mock_reply_log.assert_called_once()
+# Атрибуты Update снимаем один раз: Mock(spec=Update) заново делает dir() при каждом создании.
+# Кешировать готовый create_autospec(Update) и раздавать copy.copy() нельзя: копия делит
+# с шаблоном _mock_children, и effective_chat, заданный в одном тесте, виден в остальных
+_UPDATE_SPEC = dir(Update)
 
-    @patch('bot.get_manager')
-    @patch('bot.reply_log')
-    async def test_handle_message_status_command(self, mock_reply_log, mock_get_manager):
-        """Test handling status command."""
-        mock_message = Mock()
-        mock_message.text = "ты"
 
-        mock_user = Mock()
-        mock_user.id = 123456789
+def _spec_update(**attrs):
+    """Build a Mock that passes isinstance(..., Update) using the cached attribute list."""
+    update = Mock(spec=_UPDATE_SPEC, **attrs)
+    update.__class__ = Update
+    return update
 
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_user = mock_user
 
-        mock_context = Mock()
-
-        from bot import handle_message
-
-        await handle_message(mock_update, mock_context)
-
-        mock_reply_log.assert_called_once()
-
-    @patch('bot.get_manager')
-    @patch('bot.reply_log')
-    async def test_handle_message_non_admin(self, mock_reply_log, mock_get_manager):
-        """Test handling message from non-admin user."""
-        mock_message = Mock()
-        mock_message.text = "дота"
-
-        mock_user = Mock()
-        mock_user.id = 999999  # Non-admin
-
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_user = mock_user
-
-        mock_context = Mock()
-
-        from bot import handle_message
-
-        await handle_message(mock_update, mock_context)
-
-        # Проверяем что ответ для не-админа
-        mock_reply_log.assert_called_once()
-        args = mock_reply_log.call_args[0]
-        self.assertIn("извини", args[0])
-
-    @patch('bot.get_manager')
-    @patch('bot.reply_log')
-    async def test_handle_message_launch_app(self, mock_reply_log, mock_get_manager):
-        """Test launching application."""
-        mock_manager = Mock()
-        mock_manager.is_running.return_value = False
-        mock_manager.launch_app.return_value = True
-        mock_get_manager.return_value = mock_manager
-
-        mock_message = Mock()
-        mock_message.text = "дота"
-
-        mock_user = Mock()
-        mock_user.id = 123456789
-
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_user = mock_user
-
-        mock_context = Mock()
-
-        from bot import handle_message
-
-        await handle_message(mock_update, mock_context)
-
-        mock_reply_log.assert_called_once()
-
-    @patch('bot.get_manager')
-    @patch('bot.reply_log')
-    async def test_handle_message_close_app(self, mock_reply_log, mock_get_manager):
-        """Test closing application."""
-        mock_manager = Mock()
-        mock_manager.is_running.return_value = True
-        mock_manager.close_app.return_value = True
-        mock_get_manager.return_value = mock_manager
-
-        mock_message = Mock()
-        mock_message.text = "закрой дота"
-
-        mock_user = Mock()
-        mock_user.id = 123456789
-
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_user = mock_user
-
-        mock_context = Mock()
-
-        from bot import handle_message
-
-        await handle_message(mock_update, mock_context)
-
-        mock_reply_log.assert_called_once()
-
-    @patch('bot.get_manager')
-    @patch('bot.reply_log')
-    async def test_handle_message_close_all(self, mock_reply_log, mock_get_manager):
-        """Test closing all applications."""
-        mock_manager = Mock()
-        mock_manager.close_all_apps.return_value = ["Dota 2", "Spotify"]
-        mock_get_manager.return_value = mock_manager
-
-        mock_message = Mock()
-        mock_message.text = "закрой"
-
-        mock_user = Mock()
-        mock_user.id = 123456789
-
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_user = mock_user
-
-        mock_context = Mock()
-
-        from bot import handle_message
-
-        await handle_message(mock_update, mock_context)
-
-        mock_reply_log.assert_called_once()
-
-    @patch('bot.get_manager')
-    @patch('bot.reply_log')
-    async def test_handle_message_statistics(self, mock_reply_log, mock_get_manager):
-        """Test getting statistics."""
-        mock_manager = Mock()
-        mock_manager.get_stats.return_value = {
-            "dota": {
-                "launches": 5,
-                "total_time": 3600,
-                "last_launch": "2025-01-10T10:00:00",
-                "name": "Dota 2"
-            }
-        }
-        mock_manager.config.get_app_config.return_value = {"name": "Dota 2", "icon": "🎮"}
-        mock_get_manager.return_value = mock_manager
-
-        mock_message = Mock()
-        mock_message.text = "статистика"
-
-        mock_user = Mock()
-        mock_user.id = 123456789
-
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_user = mock_user
-
-        mock_context = Mock()
-
-        from bot import handle_message
+class TestBotCore(unittest.IsolatedAsyncioTestCase):
+    """Tests for bot core functionality."""
 
-        await handle_message(mock_update, mock_context)
+    # Исключения для side_effect создаются один раз на класс
+    _CONFIG_EXC = RuntimeError("Config error")
+    _LAUNCH_EXC = RuntimeError("Launch error")
+    _CLOSE_EXC = RuntimeError("Close error")
+    _CLOSE_ALL_EXC = RuntimeError("Close all error")
+    _NETWORK_EXC = RuntimeError("Network error")
+
+    @classmethod
+    def setUpClass(cls):
+        """Patch the bot environment once for the whole class."""
+        # Тесты с другим окружением патчат его локально с clear=True
+        cls.env_patcher = patch.dict(os.environ, _BOT_ENV)
+        cls.env_patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Restore the environment."""
+        cls.env_patcher.stop()
 
-        mock_reply_log.assert_called_once()
+    def setUp(self):
+        """Patch bot.get_manager for every test."""
+        # Тест только задает return_value/side_effect вместо своего with patch
+        patcher = patch('bot.get_manager')
+        self.mock_get_manager = patcher.start()
+        self.addCleanup(patcher.stop)
 
-    async     def test_reply_log_success(self):
+    async def test_reply_log_success(self):
         """Test successful reply logging."""
-        mock_message = Mock()
-        mock_message.reply_text = Mock(return_value=None)
-
-        mock_update = Mock()
-        mock_update.message = mock_message
-
-        from bot import reply_log
+        mock_message = _make_reply()
+        mock_update = SimpleNamespace(message=mock_message)
 
         await reply_log("test message", mock_update, 123456)
 
@@ -1502,62 +1341,49 @@ class TestBotCore(unittest.IsolatedAsyncioTestCase):
     def test_console_encoding_fallback(self):
         """Test console encoding fallback."""
         # Мокаем sys.stdout.reconfigure чтобы он выбрасывал AttributeError
-        with patch('sys.stdout.reconfigure', side_effect=AttributeError):
-            with patch('sys.stderr.reconfigure', side_effect=AttributeError):
-                # Импортируем bot - должен обработать исключения
-                import sys
-                if 'bot' in sys.modules:
-                    del sys.modules['bot']
-
-                # Это должно выполниться без ошибок
-                import bot
+        # (create=True: с `unittest -b` потоки подменены на StringIO без reconfigure)
+        with patch('sys.stdout.reconfigure', side_effect=AttributeError, create=True):
+            with patch('sys.stderr.reconfigure', side_effect=AttributeError, create=True):
+                # Перезагружаем bot - должен обработать исключения
+                importlib.reload(bot)
 
     def test_token_missing_exceptions(self):
         """Test exceptions when tokens are missing."""
-        # Test missing TELEGRAM_BOT_TOKEN
-        with patch.dict(os.environ, {'ADMIN_ID': '123'}, clear=True):
-            with self.assertRaises(RuntimeError) as cm:
-                import sys
-                if 'bot' in sys.modules:
-                    del sys.modules['bot']
-                import bot
-            self.assertIn("TELEGRAM_BOT_TOKEN", str(cm.exception))
-
-        # Test missing ADMIN_ID
-        with patch.dict(os.environ, {'TELEGRAM_BOT_TOKEN': 'token'}, clear=True):
-            with self.assertRaises(RuntimeError) as cm:
-                import sys
-                if 'bot' in sys.modules:
-                    del sys.modules['bot']
-                import bot
-            self.assertIn("ADMIN_ID", str(cm.exception))
+        try:
+            # Test missing TELEGRAM_BOT_TOKEN
+            with patch.dict(os.environ, {'ADMIN_ID': '123'}, clear=True):
+                with self.assertRaises(RuntimeError) as cm:
+                    importlib.reload(bot)
+                self.assertIn("TELEGRAM_BOT_TOKEN", str(cm.exception))
+
+            # Test missing ADMIN_ID
+            with patch.dict(os.environ, {'TELEGRAM_BOT_TOKEN': 'token'}, clear=True):
+                with self.assertRaises(RuntimeError) as cm:
+                    importlib.reload(bot)
+                self.assertIn("ADMIN_ID", str(cm.exception))
+        finally:
+            # Неудачный reload оставляет модуль недоинициализированным
+            with patch.dict(os.environ, _BOT_ENV):
+                importlib.reload(bot)
 
     async def test_rate_limit_no_user(self):
         """Test rate limit with no effective user."""
-        from bot import rate_limit
-
         @rate_limit()
         async def dummy_func(update, context):
             return "called"
 
-        mock_update = Mock()
-        mock_update.effective_user = None
+        mock_update = SimpleNamespace(effective_user=None)
 
         result = await dummy_func(mock_update, Mock())
         self.assertIsNone(result)
 
     async def test_rate_limit_admin_bypass(self):
         """Test that admin bypasses rate limiting."""
-        from bot import rate_limit
-
         @rate_limit()
         async def dummy_func(update, context):
             return "called"
 
-        mock_update = Mock()
-        mock_user = Mock()
-        mock_user.id = 123456789  # ADMIN_ID
-        mock_update.effective_user = mock_user
+        mock_update = _make_update("")  # ADMIN_ID
 
         with patch('bot.last_command_time', {}):
             result = await dummy_func(mock_update, Mock())
@@ -1565,476 +1391,185 @@ class TestBotCore(unittest.IsolatedAsyncioTestCase):
 
     async def test_rate_limit_enforced(self):
         """Test rate limiting enforcement."""
-        from bot import rate_limit, last_command_time
-
-        # Очищаем rate limit для теста
-        last_command_time.clear()
+        # Очищаем rate limit для теста (словарь берем из модуля: reload его пересоздает)
+        bot.last_command_time.clear()
 
         @rate_limit(seconds=1)
         async def dummy_func(update, context):
             return "called"
 
-        from unittest.mock import AsyncMock
-
-        mock_update = Mock()
-        mock_user = Mock()
-        mock_user.id = 999999  # Non-admin
-        mock_update.effective_user = mock_user
-        mock_update.message = Mock()
-        mock_update.message.reply_text = AsyncMock()
+        mock_update = _make_update("", 999999)  # Non-admin
 
-        # Первый вызов
-        with patch('bot.time', return_value=100):
+        # Фальшивые часы: второй вызов через полсекунды после первого
+        clock = iter([100.0, 100.5])
+        with swap(bot, time=lambda: next(clock)):
             result1 = await dummy_func(mock_update, Mock())
             self.assertEqual(result1, "called")
 
-        # Второй вызов слишком быстро
-        with patch('bot.time', return_value=100.5):
+            # Второй вызов слишком быстро
             result2 = await dummy_func(mock_update, Mock())
             self.assertIsNone(result2)  # Rate limiting должен вернуть None
 
     async def test_handle_message_no_message(self):
         """Test handle_message with no message."""
-        mock_update = Mock()
-        mock_update.message = None
-
-        from bot import handle_message
+        mock_update = SimpleNamespace(message=None, effective_user=SimpleNamespace(id=123456789))
 
         result = await handle_message(mock_update, Mock())
         self.assertIsNone(result)
 
     async def test_handle_message_empty_text(self):
         """Test handle_message with empty text."""
-        mock_message = Mock()
-        mock_message.text = ""
-
-        mock_user = Mock()
-        mock_user.id = 123456789
-
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_user = mock_user
-
-        from bot import handle_message
+        mock_update = _make_update("")
 
         result = await handle_message(mock_update, Mock())
         self.assertIsNone(result)
 
-    async def test_handle_message_responses_command(self):
-        """Test responses command."""
-        mock_message = Mock()
-        mock_message.text = "ответы"
-
-        mock_user = Mock()
-        mock_user.id = 123456789
-
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_user = mock_user
-
-        from bot import handle_message
-
-        await handle_message(mock_update, Mock())
-
-    async def test_handle_message_menu_command(self):
-        """Test menu command."""
-        mock_message = Mock()
-        mock_message.text = "меню"
-
-        mock_user = Mock()
-        mock_user.id = 123456789
-
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_user = mock_user
-
-        from bot import handle_message
-
-        await handle_message(mock_update, Mock())
-
     async def test_handle_message_stats_parsing_error(self):
         """Test statistics parsing error."""
-        mock_message = Mock()
-        mock_message.text = "статистика"
-
-        mock_user = Mock()
-        mock_user.id = 123456789
-
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_user = mock_user
+        mock_update = _make_update("статистика")
 
         mock_manager = Mock()
-        mock_manager.get_stats.return_value = {
-            "test_app": {
-                "launches": 1,
-                "total_time": 100,
-                "last_launch": "invalid-date",  # Invalid date
-            }
-        }
+        mock_manager.get_stats.return_value = _STATS_BAD_DATE
         mock_manager.config.get_app_config.return_value = {"name": "Test"}
 
-        with patch('bot.get_manager', return_value=mock_manager):
-            from bot import handle_message
-            await handle_message(mock_update, Mock())
+        self.mock_get_manager.return_value = mock_manager
+        await handle_message(mock_update, Mock())
 
     async def test_handle_message_stats_app_error(self):
         """Test statistics app processing error."""
-        mock_message = Mock()
-        mock_message.text = "статистика"
-
-        mock_user = Mock()
-        mock_user.id = 123456789
-
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_user = mock_user
+        mock_update = _make_update("статистика")
 
         mock_manager = Mock()
-        mock_manager.get_stats.return_value = {
-            "test_app": {
-                "launches": 1,
-                "total_time": 100,
-                "last_launch": "2025-01-01T10:00:00",
-            }
-        }
-        mock_manager.config.get_app_config.side_effect = Exception("Config error")
+        mock_manager.get_stats.return_value = _STATS_OK
+        mock_manager.config.get_app_config.side_effect = self._CONFIG_EXC
 
-        with patch('bot.get_manager', return_value=mock_manager):
-            from bot import handle_message
-            await handle_message(mock_update, Mock())
+        self.mock_get_manager.return_value = mock_manager
+        await handle_message(mock_update, Mock())
 
     async def test_handle_message_already_running(self):
         """Test launching already running app."""
-        mock_message = Mock()
-        mock_message.text = "дота"
-
-        mock_user = Mock()
-        mock_user.id = 123456789
-
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_user = mock_user
+        mock_update = _make_update("дота")
 
         mock_manager = Mock()
         mock_manager.is_running.return_value = True
         mock_manager.config.get_app_config.return_value = {"name": "Dota 2"}
 
-        with patch('bot.get_manager', return_value=mock_manager):
-            from bot import handle_message
-            await handle_message(mock_update, Mock())
+        self.mock_get_manager.return_value = mock_manager
+        await handle_message(mock_update, Mock())
 
     async def test_handle_message_launch_exception(self):
         """Test launch exception handling."""
-        mock_message = Mock()
-        mock_message.text = "дота"
-
-        mock_user = Mock()
-        mock_user.id = 123456789
-
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_user = mock_user
+        mock_update = _make_update("дота")
 
         mock_manager = Mock()
         mock_manager.is_running.return_value = False
-        mock_manager.launch_app.side_effect = Exception("Launch error")
+        mock_manager.launch_app.side_effect = self._LAUNCH_EXC
 
-        with patch('bot.get_manager', return_value=mock_manager):
-            from bot import handle_message
-            await handle_message(mock_update, Mock())
+        self.mock_get_manager.return_value = mock_manager
+        await handle_message(mock_update, Mock())
 
     async def test_handle_message_close_exception(self):
         """Test close exception handling."""
-        mock_message = Mock()
-        mock_message.text = "закрой дота"
-
-        mock_user = Mock()
-        mock_user.id = 123456789
-
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_user = mock_user
+        mock_update = _make_update("закрой дота")
 
         mock_manager = Mock()
         mock_manager.is_running.return_value = True
-        mock_manager.close_app.side_effect = Exception("Close error")
+        mock_manager.close_app.side_effect = self._CLOSE_EXC
 
-        with patch('bot.get_manager', return_value=mock_manager):
-            from bot import handle_message
-            await handle_message(mock_update, Mock())
+        self.mock_get_manager.return_value = mock_manager
+        await handle_message(mock_update, Mock())
 
     async def test_handle_message_close_all_exception(self):
         """Test close all exception handling."""
-        mock_message = Mock()
-        mock_message.text = "закрой"
-
-        mock_user = Mock()
-        mock_user.id = 123456789
-
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_user = mock_user
+        mock_update = _make_update("закрой")
 
         mock_manager = Mock()
-        mock_manager.close_all_apps.side_effect = Exception("Close all error")
+        mock_manager.close_all_apps.side_effect = self._CLOSE_ALL_EXC
 
-        with patch('bot.get_manager', return_value=mock_manager):
-            from bot import handle_message
-            await handle_message(mock_update, Mock())
+        self.mock_get_manager.return_value = mock_manager
+        await handle_message(mock_update, Mock())
 
     async def test_handle_message_close_config_exception(self):
         """Test close config exception handling."""
-        mock_message = Mock()
-        mock_message.text = "закрой"
-
-        mock_user = Mock()
-        mock_user.id = 123456789
-
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_user = mock_user
+        mock_update = _make_update("закрой")
 
         mock_manager = Mock()
         mock_manager.close_all_apps.return_value = ["app1", "app2"]
-        mock_manager.config.get_app_config.side_effect = Exception("Config error")
+        mock_manager.config.get_app_config.side_effect = self._CONFIG_EXC
 
-        with patch('bot.get_manager', return_value=mock_manager):
-            from bot import handle_message
-            await handle_message(mock_update, Mock())
+        self.mock_get_manager.return_value = mock_manager
+        await handle_message(mock_update, Mock())
 
     async def test_handle_message_fallback(self):
         """Test fallback message handling."""
-        mock_message = Mock()
-        mock_message.text = "unknown command"
-
-        mock_user = Mock()
-        mock_user.id = 123456789
-
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_user = mock_user
-
-        from bot import handle_message
+        mock_update = _make_update("unknown command")
 
         await handle_message(mock_update, Mock())
 
-    async def test_start_command_admin(self):
-        """Test /start command for admin."""
-        from unittest.mock import AsyncMock
-
-        mock_message = Mock()
-        mock_message.reply_text = AsyncMock()
-
-        mock_user = Mock()
-        mock_user.id = 123456789
-
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_user = mock_user
-
-        from bot import start
-
-        await start(mock_update, Mock())
-
-        mock_message.reply_text.assert_called_once()
-
-    async def test_start_command_non_admin(self):
-        """Test /start command for non-admin."""
-        from unittest.mock import AsyncMock
-
-        mock_message = Mock()
-        mock_message.reply_text = AsyncMock()
-
-        mock_user = Mock()
-        mock_user.id = 999999
-
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_user = mock_user
-
-        from bot import start
-
-        await start(mock_update, Mock())
-
-        # Проверяем что сообщение было отправлено (может быть rate limit или отказ)
-        mock_message.reply_text.assert_called_once()
-
-    async def test_help_command_admin(self):
-        """Test /help command for admin."""
-        from unittest.mock import AsyncMock
-
-        mock_message = Mock()
-        mock_message.reply_text = AsyncMock()
-
-        mock_user = Mock()
-        mock_user.id = 123456789
+    async def test_start_and_help_commands(self):
+        """Test /start and /help for admin and non-admin users."""
+        # Одна петля событий на все четыре случая вместо четырёх тестов
+        for command in (start, help_command):
+            for uid in (123456789, 999999):
+                with self.subTest(command=command.__name__, uid=uid):
+                    mock_update = _make_update(None, uid)
 
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_user = mock_user
+                    await command(mock_update, Mock())
 
-        from bot import help_command
+                    # Для не-админа это может быть rate limit или отказ
+                    mock_update.message.reply_text.assert_called_once()
 
-        await help_command(mock_update, Mock())
+    async def test_error_handler_errors(self):
+        """Test error handler with each Telegram error type."""
+        errors = (NetworkError("Network error"), TimedOut(), RetryAfter(30),
+                  TelegramError("Telegram error"))
+        for error in errors:
+            with self.subTest(error=type(error).__name__):
+                mock_context = SimpleNamespace(error=error, bot=Mock())
 
-        mock_message.reply_text.assert_called_once()
-
-    async def test_help_command_non_admin(self):
-        """Test /help command for non-admin."""
-        from unittest.mock import AsyncMock
-
-        mock_message = Mock()
-        mock_message.reply_text = AsyncMock()
-
-        mock_user = Mock()
-        mock_user.id = 999999
-
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_user = mock_user
-
-        from bot import help_command
-
-        await help_command(mock_update, Mock())
-
-        # Проверяем что сообщение было отправлено (может быть rate limit или отказ)
-        mock_message.reply_text.assert_called_once()
-
-    async def test_error_handler_network_error(self):
-        """Test error handler with NetworkError."""
-        from telegram.error import NetworkError
-
-        mock_context = Mock()
-        mock_context.error = NetworkError("Network error")
-        mock_context.bot = Mock()
-
-        from bot import error_handler
-
-        await error_handler(None, mock_context)
-
-    async def test_error_handler_timeout_error(self):
-        """Test error handler with TimedOut."""
-        from telegram.error import TimedOut
-
-        mock_context = Mock()
-        mock_context.error = TimedOut()
-        mock_context.bot = Mock()
-
-        from bot import error_handler
-
-        await error_handler(None, mock_context)
-
-    async def test_error_handler_retry_after(self):
-        """Test error handler with RetryAfter."""
-        from telegram.error import RetryAfter
-
-        mock_context = Mock()
-        mock_context.error = RetryAfter(30)
-        mock_context.bot = Mock()
-
-        from bot import error_handler
-
-        await error_handler(None, mock_context)
-
-    async def test_error_handler_telegram_error(self):
-        """Test error handler with TelegramError."""
-        from telegram.error import TelegramError
-
-        mock_context = Mock()
-        mock_context.error = TelegramError("Telegram error")
-        mock_context.bot = Mock()
-
-        from bot import error_handler
-
-        await error_handler(None, mock_context)
+                await error_handler(None, mock_context)
 
     async def test_error_handler_with_user_message(self):
         """Test error handler that sends message to user."""
-        from telegram.error import TelegramError
-        from telegram import Update
-
         # Создаем правильный mock update
-        mock_update = Mock(spec=Update)
-        mock_update.effective_chat = Mock()
-        mock_update.effective_chat.id = 123456
+        mock_update = _spec_update(**{'effective_chat.id': 123456})
 
-        mock_context = Mock()
-        mock_context.error = TelegramError("Error")
-        mock_context.bot = Mock()
-
-        from bot import error_handler
+        mock_context = SimpleNamespace(error=TelegramError("Error"), bot=Mock())
 
         await error_handler(mock_update, mock_context)
 
         mock_context.bot.send_message.assert_called_once()
 
-    def test_main_manager_init_error(self):
-        """Test main function manager initialization error."""
-        with patch('bot.get_manager', side_effect=Exception("Manager error")):
-            from bot import main
-            with self.assertRaises(Exception):
-                main()
-
-    def test_main_polling_keyboard_interrupt(self):
-        """Test main function with KeyboardInterrupt during polling."""
-        mock_app = Mock()
-        mock_app.run_polling.side_effect = KeyboardInterrupt()
-
-        with patch('bot.get_manager'):
-            with patch('bot.Application.builder') as mock_builder:
-                mock_builder.return_value.token.return_value.build.return_value = mock_app
-
-                from bot import main
-                with self.assertRaises(KeyboardInterrupt):
-                    main()
-
-    def test_main_polling_error(self):
-        """Test main function polling error."""
-        mock_app = Mock()
-        mock_app.run_polling.side_effect = Exception("Polling error")
-
-        with patch('bot.get_manager'):
-            with patch('bot.Application.builder') as mock_builder:
-                mock_builder.return_value.token.return_value.build.return_value = mock_app
-
-                from bot import main
-                with self.assertRaises(Exception):
-                    main()
-
-    def test_main_config_error(self):
-        """Test main function configuration error."""
-        with patch('bot.get_manager'):
-            with patch('bot.Application.builder', side_effect=ValueError("Config error")):
-
-                from bot import main
-                with self.assertRaises(ValueError):
-                    main()
-
-    def test_main_general_error(self):
-        """Test main function general error."""
-        with patch('bot.get_manager'):
-            with patch('bot.Application.builder', side_effect=Exception("General error")):
-
-                from bot import main
-                with self.assertRaises(Exception):
+    def test_main_error_matrix(self):
+        """Test that main propagates manager, polling and configuration errors."""
+        def polling_builder(error):
+            # Application.builder().token(...).build() отдает приложение, падающее в run_polling
+            builder = Mock()
+            builder.token.return_value.build.return_value.run_polling.side_effect = error
+            return builder
+
+        # (что патчим, настройки патча, ожидаемое исключение)
+        cases = (
+            ('bot.get_manager', {'side_effect': Exception("Manager error")}, Exception),
+            ('bot.Application.builder',
+             {'return_value': polling_builder(KeyboardInterrupt())}, KeyboardInterrupt),
+            ('bot.Application.builder',
+             {'return_value': polling_builder(Exception("Polling error"))}, Exception),
+            ('bot.Application.builder', {'side_effect': ValueError("Config error")}, ValueError),
+            ('bot.Application.builder', {'side_effect': Exception("General error")}, Exception),
+        )
+        for target, patch_kwargs, expected in cases:
+            with self.subTest(target=target, **patch_kwargs):
+                with patch(target, **patch_kwargs), self.assertRaises(expected):
                     main()
 
     async def test_reply_log_fallback(self):
         """Test reply log fallback."""
-        mock_message = Mock()
-        mock_message.reply_text.side_effect = Exception("Network error")
-
         mock_bot = Mock()
-        mock_chat = Mock()
-        mock_chat.id = 123456
-
-        mock_update = Mock()
-        mock_update.message = mock_message
-        mock_update.effective_chat = mock_chat
-        mock_update.message.bot = mock_bot
-
-        from bot import reply_log
+        mock_message = SimpleNamespace(reply_text=Mock(side_effect=self._NETWORK_EXC),
+                                       bot=mock_bot)
+        mock_update = SimpleNamespace(message=mock_message,
+                                      effective_chat=SimpleNamespace(id=123456))
 
         await reply_log("test message", mock_update, 123456)
 
@@ -2042,90 +1577,94 @@ class TestBotCore(unittest.IsolatedAsyncioTestCase):
         mock_bot.send_message.assert_called_once()
 
 
-class TestLauncherGUI(unittest.TestCase):
-    """Tests for launcher GUI (mocked to avoid GUI dependencies)."""
-
-    @patch('launcher.ctk')
-    @patch('launcher.check_and_install_dependencies', return_value=True)
-    def test_launcher_initialization(self, mock_check_deps, mock_ctk):
-        """Test launcher GUI initialization."""
-        mock_root = Mock()
-        mock_ctk.CTk.return_value = mock_root
-
-        from launcher import LauncherGUI
-
-        launcher = LauncherGUI()
-
-        # Проверяем что GUI была инициализирована
-        mock_ctk.CTk.assert_called_once()
-        self.assertIsNotNone(launcher.root)
-
-    @patch('launcher.check_and_install_dependencies')
-    def test_check_dependencies_success(self, mock_check):
-        """Test dependency checking success."""
-        mock_check.return_value = True
-
-        from launcher import check_and_install_dependencies
-
-        result = check_and_install_dependencies()
-        self.assertTrue(result)
-
-    def test_check_dependencies_install(self):
-        """Test dependency installation."""
-        # Просто проверяем что функция существует и может быть вызвана
-        # Полное тестирование launcher требует более сложной настройки
-        from launcher import check_and_install_dependencies
-
-        # Функция должна существовать
-        self.assertTrue(callable(check_and_install_dependencies))
-
+class TestBotHandleMessage(unittest.IsolatedAsyncioTestCase):
+    """Tests for handle_message with get_manager and reply_log mocked."""
 
+    def setUp(self):
+        """Patch bot.get_manager and bot.reply_log for every test."""
+        # Один patch.multiple на тест вместо пары декораторов на каждом методе
+        patcher = patch.multiple('bot', get_manager=DEFAULT, reply_log=DEFAULT)
+        mocks = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mock_get_manager = mocks['get_manager']
+        self.mock_reply_log = mocks['reply_log']
+
+    # (текст, user_id, настройки мока менеджера, ожидаемая подстрока ответа)
+    _CASES = (
+        ("хелп", 123456789, {}, None),
+        ("ты", 123456789, {}, None),
+        ("ответы", 123456789, {}, None),
+        ("меню", 123456789, {}, None),
+        ("дота", 999999, {}, "извини"),
+        ("дота", 123456789,
+         {'is_running.return_value': False, 'launch_app.return_value': True}, None),
+        ("закрой дота", 123456789,
+         {'is_running.return_value': True, 'close_app.return_value': True}, None),
+        ("закрой", 123456789,
+         {'close_all_apps.return_value': ["Dota 2", "Spotify"]}, None),
+        ("статистика", 123456789,
+         {'get_stats.return_value': _STATS_OK,
+          'config.get_app_config.return_value': {"name": "Test", "icon": "🎮"}}, None),
+    )
+
+    async def test_handle_message_replies(self):
+        """Test that each command is answered exactly once via reply_log."""
+        for text, uid, manager_attrs, expect_substr in self._CASES:
+            with self.subTest(text=text, uid=uid):
+                self.mock_reply_log.reset_mock()
+                self.mock_get_manager.return_value = Mock(**manager_attrs)
+
+                await handle_message(_make_update(text, uid), Mock())
+
+                self.mock_reply_log.assert_called_once()
+                if expect_substr is not None:
+                    self.assertIn(expect_substr, self.mock_reply_log.call_args[0][0])
+
+
+@unittest.skipUnless(_HAS_CTK, 'customtkinter not installed')
 class TestGUIApp(unittest.TestCase):
     """Tests for GUI application (mocked)."""
 
-    @patch('gui.ctk')
-    @patch('gui.get_manager')
-    def test_gui_initialization(self, mock_get_manager, mock_ctk):
+    def setUp(self):
+        """Patch gui.ctk and gui.get_manager with an empty manager for every test."""
+        patcher = patch.multiple('gui', ctk=DEFAULT, get_manager=DEFAULT)
+        mocks = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # Общий каркас: окно CTk, конфиг без приложений и пустая статистика
+        self.mock_ctk = mocks['ctk']
+        self.mock_root = self.mock_ctk.CTk.return_value
+        self.mock_manager = mocks['get_manager'].return_value
+        self.mock_manager.config.get_all_apps.return_value = {}
+        self.mock_manager.config.get_app_config.return_value = {"name": "Test App"}
+        self.mock_manager.get_stats.return_value = {}
+
+    def test_gui_initialization(self):
         """Test GUI app initialization."""
-        mock_root = Mock()
-        mock_ctk.CTk.return_value = mock_root
-        mock_ctk.set_appearance_mode = Mock()
-        mock_ctk.set_default_color_theme = Mock()
-
-        mock_config = Mock()
-        mock_config.get_all_apps.return_value = {"test_app": {"name": "Test"}}
-
-        mock_manager = Mock()
-        mock_manager.config = mock_config
-        mock_manager.get_stats.return_value = {"test_app": {"launches": 1, "total_time": 100}}
-        mock_get_manager.return_value = mock_manager
-
-        from gui import AppManagerGUI
+        self.mock_manager.config.get_all_apps.return_value = {"test_app": {"name": "Test"}}
+        self.mock_manager.get_stats.return_value = {"test_app": {"launches": 1, "total_time": 100}}
 
         gui = AppManagerGUI()
 
         # Проверяем базовую инициализацию
-        mock_ctk.CTk.assert_called_once()
+        self.mock_ctk.CTk.assert_called_once()
         self.assertIsNotNone(gui.root)
-        self.assertEqual(gui.manager, mock_manager)
+        self.assertEqual(gui.manager, self.mock_manager)
 
     def test_text_handler_emit(self):
         """Test TextHandler emit method."""
-        from gui import TextHandler
-
         mock_text_widget = Mock()
         handler = TextHandler(mock_text_widget)
 
-        # Создаем тестовый лог
-        import logging
-        record = logging.LogRecord(
-            name="test",
-            level=logging.INFO,
-            pathname="",
-            lineno=0,
-            msg="Test message",
-            args=(),
-            exc_info=None
+        # Форматтеру нужны только эти поля, настоящий LogRecord не собираем
+        record = SimpleNamespace(
+            getMessage=lambda: "Test message",
+            levelname="INFO",
+            created=0.0,
+            msecs=0.0,
+            exc_info=None,
+            exc_text=None,
+            stack_info=None,
         )
 
         # Вызываем emit
@@ -2134,30 +1673,13 @@ class TestGUIApp(unittest.TestCase):
         # Проверяем что after был вызван
         mock_text_widget.after.assert_called_once()
 
-    @patch('gui.ctk')
-    @patch('gui.get_manager')
-    def test_gui_schedule_update_window_closed(self, mock_get_manager, mock_ctk):
+    def test_gui_schedule_update_window_closed(self):
         """Test schedule_update when window is closed."""
-        mock_root = Mock()
-        mock_ctk.CTk.return_value = mock_root
-        mock_ctk.set_appearance_mode = Mock()
-        mock_ctk.set_default_color_theme = Mock()
-
-        mock_config = Mock()
-        mock_config.get_all_apps.return_value = {}
-
-        mock_manager = Mock()
-        mock_manager.config = mock_config
-        mock_manager.get_stats.return_value = {}
-        mock_get_manager.return_value = mock_manager
-
-        from gui import AppManagerGUI
-
         gui = AppManagerGUI()
         gui._is_closing = False
 
         # Мокаем что окно не существует
-        mock_root.winfo_exists.return_value = False
+        self.mock_root.winfo_exists.return_value = False
 
         # Вызываем schedule_update
         gui.schedule_update()
@@ -2165,26 +1687,9 @@ class TestGUIApp(unittest.TestCase):
         # Проверяем что _is_closing установлено
         self.assertTrue(gui._is_closing)
 
-    @patch('gui.ctk')
-    @patch('gui.get_manager')
-    def test_gui_launch_app_gui_success(self, mock_get_manager, mock_ctk):
+    def test_gui_launch_app_gui_success(self):
         """Test launch_app_gui successful launch."""
-        mock_root = Mock()
-        mock_ctk.CTk.return_value = mock_root
-        mock_ctk.set_appearance_mode = Mock()
-        mock_ctk.set_default_color_theme = Mock()
-
-        mock_config = Mock()
-        mock_config.get_all_apps.return_value = {}
-        mock_config.get_app_config.return_value = {"name": "Test App"}
-
-        mock_manager = Mock()
-        mock_manager.config = mock_config
-        mock_manager.launch_app.return_value = True
-        mock_manager.get_stats.return_value = {}  # Пустая статистика
-        mock_get_manager.return_value = mock_manager
-
-        from gui import AppManagerGUI
+        self.mock_manager.launch_app.return_value = True
 
         gui = AppManagerGUI()
 
@@ -2197,26 +1702,9 @@ class TestGUIApp(unittest.TestCase):
         # Проверяем что статус бар обновлен
         gui.status_bar.configure.assert_called()
 
-    @patch('gui.ctk')
-    @patch('gui.get_manager')
-    def test_gui_close_app_gui_success(self, mock_get_manager, mock_ctk):
+    def test_gui_close_app_gui_success(self):
         """Test close_app_gui successful close."""
-        mock_root = Mock()
-        mock_ctk.CTk.return_value = mock_root
-        mock_ctk.set_appearance_mode = Mock()
-        mock_ctk.set_default_color_theme = Mock()
-
-        mock_config = Mock()
-        mock_config.get_all_apps.return_value = {}
-        mock_config.get_app_config.return_value = {"name": "Test App"}
-
-        mock_manager = Mock()
-        mock_manager.config = mock_config
-        mock_manager.close_app.return_value = True
-        mock_manager.get_stats.return_value = {}  # Пустая статистика
-        mock_get_manager.return_value = mock_manager
-
-        from gui import AppManagerGUI
+        self.mock_manager.close_app.return_value = True
 
         gui = AppManagerGUI()
         gui.status_bar = Mock()
@@ -2225,26 +1713,9 @@ class TestGUIApp(unittest.TestCase):
 
         gui.status_bar.configure.assert_called()
 
-    @patch('gui.ctk')
-    @patch('gui.get_manager')
-    def test_gui_close_all_apps_success(self, mock_get_manager, mock_ctk):
+    def test_gui_close_all_apps_success(self):
         """Test close_all_apps successful."""
-        mock_root = Mock()
-        mock_ctk.CTk.return_value = mock_root
-        mock_ctk.set_appearance_mode = Mock()
-        mock_ctk.set_default_color_theme = Mock()
-
-        mock_config = Mock()
-        mock_config.get_all_apps.return_value = {}
-        mock_config.get_app_config.return_value = {"name": "Test App"}
-
-        mock_manager = Mock()
-        mock_manager.config = mock_config
-        mock_manager.close_all_apps.return_value = ["test_app"]
-        mock_manager.get_stats.return_value = {}  # Пустая статистика
-        mock_get_manager.return_value = mock_manager
-
-        from gui import AppManagerGUI
+        self.mock_manager.close_all_apps.return_value = ["test_app"]
 
         gui = AppManagerGUI()
         gui.status_bar = Mock()
@@ -2253,66 +1724,33 @@ class TestGUIApp(unittest.TestCase):
 
         gui.status_bar.configure.assert_called()
 
-    @patch('gui.ctk')
-    @patch('gui.get_manager')
-    def test_gui_update_statuses_window_closed(self, mock_get_manager, mock_ctk):
+    def test_gui_update_statuses_window_closed(self):
         """Test update_statuses when window is closed."""
-        mock_root = Mock()
-        mock_ctk.CTk.return_value = mock_root
-        mock_ctk.set_appearance_mode = Mock()
-        mock_ctk.set_default_color_theme = Mock()
-
-        mock_config = Mock()
-        mock_config.get_all_apps.return_value = {}
-
-        mock_manager = Mock()
-        mock_manager.config = mock_config
-        mock_manager.get_stats.return_value = {}
-        mock_get_manager.return_value = mock_manager
-
-        from gui import AppManagerGUI
-
         gui = AppManagerGUI()
         gui._is_closing = False
         gui.status_labels = {}
         gui.status_indicators = {}
 
         # Мокаем что окно закрыто
-        mock_root.winfo_exists.return_value = False
+        self.mock_root.winfo_exists.return_value = False
 
         gui.update_statuses()
 
         self.assertTrue(gui._is_closing)
 
-    @patch('gui.ctk')
-    @patch('gui.get_manager')
-    def test_gui_on_closing(self, mock_get_manager, mock_ctk):
+    def test_gui_on_closing(self):
         """Test on_closing method."""
-        mock_root = Mock()
-        mock_ctk.CTk.return_value = mock_root
-        mock_ctk.set_appearance_mode = Mock()
-        mock_ctk.set_default_color_theme = Mock()
-
-        mock_config = Mock()
-        mock_config.get_all_apps.return_value = {}
-
-        mock_manager = Mock()
-        mock_manager.config = mock_config
-        mock_manager.get_stats.return_value = {}
-        mock_get_manager.return_value = mock_manager
-
-        from gui import AppManagerGUI
-
         gui = AppManagerGUI()
 
         gui.on_closing()
 
         self.assertTrue(gui._is_closing)
-        mock_manager.close_all_apps.assert_called_once()
-        mock_manager.save_pids.assert_called_once()
-        mock_root.destroy.assert_called_once()
+        self.mock_manager.close_all_apps.assert_called_once()
+        self.mock_manager.save_pids.assert_called_once()
+        self.mock_root.destroy.assert_called_once()
 
 
+@unittest.skipUnless(_HAS_CTK, 'customtkinter not installed')
 class TestLauncherGUI(unittest.TestCase):
     """Tests for launcher GUI (minimal tests)."""
 
@@ -2331,109 +1769,194 @@ class TestLauncherGUI(unittest.TestCase):
         self.assertIsNotNone(launcher.root)
         mock_ctk.CTk.assert_called_once()
 
+    @patch('launcher.ctk')
+    @patch('launcher.check_and_install_dependencies', return_value=True)
+    def test_launcher_initialization(self, mock_check_deps, mock_ctk):
+        """Test launcher GUI initialization."""
+        mock_root = Mock()
+        mock_ctk.CTk.return_value = mock_root
+
+        from launcher import LauncherGUI
+
+        launcher = LauncherGUI()
+
+        # Проверяем что GUI была инициализирована
+        mock_ctk.CTk.assert_called_once()
+        self.assertIsNotNone(launcher.root)
+
+    @patch('launcher.check_and_install_dependencies')
+    def test_check_dependencies_success(self, mock_check):
+        """Test dependency checking success."""
+        mock_check.return_value = True
+
+        from launcher import check_and_install_dependencies
+
+        result = check_and_install_dependencies()
+        self.assertTrue(result)
+
+    def test_check_dependencies_install(self):
+        """Test dependency installation."""
+        # Просто проверяем что функция существует и может быть вызвана
+        # Полное тестирование launcher требует более сложной настройки
+        from launcher import check_and_install_dependencies
+
+        # Функция должна существовать
+        self.assertTrue(callable(check_and_install_dependencies))
+
     def test_check_env_file_exists(self):
         """Test check_env_file when file exists."""
         from launcher import LauncherGUI
 
-        # Создаем временный .env файл
-        with open('.env', 'w') as f:
-            f.write('TELEGRAM_BOT_TOKEN=123456789:ABCdefGHIjklMNOpqrsTUVwxyz\nADMIN_ID=123\n')
-
-        try:
+        # Содержимое .env отдаем из памяти, наличие файла передаем через entries
+        env = mock_open(read_data=b'TELEGRAM_BOT_TOKEN=123456789:ABCdefGHIjklMNOpqrsTUVwxyz\nADMIN_ID=123\n')
+        with patch('launcher.open', env, create=True):
             launcher = LauncherGUI()
             # Мокаем метод show_error чтобы избежать GUI проблем
             launcher.show_error = Mock()
-            result = launcher.check_env_file()
-            self.assertTrue(result)
-            # Проверяем что show_error не был вызван
-            launcher.show_error.assert_not_called()
-        finally:
-            # Удаляем файл
-            if os.path.exists('.env'):
-                os.remove('.env')
+            result = launcher.check_env_file({'.env': None})
+        self.assertTrue(result)
+        # Проверяем что show_error не был вызван
+        launcher.show_error.assert_not_called()
 
     def test_check_env_file_missing(self):
         """Test check_env_file when file doesn't exist."""
         from launcher import LauncherGUI
 
-        # Убеждаемся что .env не существует
-        if os.path.exists('.env'):
-            os.remove('.env')
-
         launcher = LauncherGUI()
-        result = launcher.check_env_file()
+        result = launcher.check_env_file({})
         self.assertFalse(result)
 
     def test_check_env_file_incomplete(self):
         """Test check_env_file when file exists but incomplete."""
         from launcher import LauncherGUI
 
-        # Создаем неполный .env файл
-        with open('.env', 'w') as f:
-            f.write('TELEGRAM_BOT_TOKEN=test\n')
+        with patch('launcher.open', mock_open(read_data=b'TELEGRAM_BOT_TOKEN=test\n'), create=True):
+            launcher = LauncherGUI()
+            result = launcher.check_env_file({'.env': None})
+        self.assertFalse(result)
 
-        try:
+    def test_read_env_keys_dotenv_syntax(self):
+        """Test read_env_keys accepts the same .env syntax as python-dotenv."""
+        from launcher import read_env_keys
+
+        expected = {'TELEGRAM_BOT_TOKEN': '123:abc', 'ADMIN_ID': '42'}
+        cases = {
+            'export': b'export ADMIN_ID=42\nexport TELEGRAM_BOT_TOKEN=123:abc\n',
+            'spaces': b'ADMIN_ID= 42 \r\nTELEGRAM_BOT_TOKEN = 123:abc\n',
+            'bom': b'\xef\xbb\xbfTELEGRAM_BOT_TOKEN=123:abc\nADMIN_ID=42\n',
+            'quotes': b'TELEGRAM_BOT_TOKEN="123:abc"\nADMIN_ID=\'42\'\n',
+        }
+        for name, data in cases.items():
+            with self.subTest(name), patch('launcher.open', mock_open(read_data=data), create=True):
+                self.assertEqual(read_env_keys(Path('.env')), expected)
+
+    def test_read_env_keys_bom_file(self):
+        """Test read_env_keys reads a real .env file that starts with a UTF-8 BOM."""
+        from launcher import read_env_keys
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            env_path = Path(temp_dir) / '.env'
+            env_path.write_bytes(b'\xef\xbb\xbfTELEGRAM_BOT_TOKEN=123:abc\r\nADMIN_ID=42\r\n')
+            self.assertEqual(read_env_keys(env_path), {'TELEGRAM_BOT_TOKEN': '123:abc', 'ADMIN_ID': '42'})
+
+    def test_check_env_file_dotenv_syntax(self):
+        """Test check_env_file accepts export prefixes, spaces and a BOM."""
+        from launcher import LauncherGUI
+
+        data = b'\xef\xbb\xbfexport TELEGRAM_BOT_TOKEN=123:abc\nADMIN_ID= 42\n'
+        with patch('launcher.open', mock_open(read_data=data), create=True):
             launcher = LauncherGUI()
-            result = launcher.check_env_file()
-            self.assertFalse(result)
-        finally:
-            if os.path.exists('.env'):
-                os.remove('.env')
+            launcher.show_error = Mock()
+            result = launcher.check_env_file({'.env': None})
+        self.assertTrue(result)
+        launcher.show_error.assert_not_called()
+
+    def _launcher_in(self, names, env=None):
+        """Build a LauncherGUI with mocked ctk inside a temp cwd holding the given files."""
+        import launcher as launcher_mod
+
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(_remove_temp_dir, temp_dir)
+        for name in names:
+            Path(temp_dir, name).touch()
+        if env is not None:
+            Path(temp_dir, '.env').write_bytes(env)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(temp_dir)
+
+        ctk_patcher = patch.object(launcher_mod, 'ctk')
+        mock_ctk = ctk_patcher.start()
+        self.addCleanup(ctk_patcher.stop)
+        # Отдельный мок на каждую переменную: статус и ошибку проверяем по отдельности
+        mock_ctk.StringVar.side_effect = lambda value=None: Mock()
+        return launcher_mod.LauncherGUI()
+
+    def test_steps_stop_on_missing_files(self):
+        """Test the launch steps stop with an error when files or .env are missing."""
+        from launcher import LauncherGUI, REQUIRED_FILES
+
+        cases = {
+            'files': ((), "ERROR: Отсутствуют файлы: " + ", ".join(REQUIRED_FILES)),
+            'env': (REQUIRED_FILES, "ERROR: .env файл не найден! Создай его из .env.example"),
+        }
+        for name, (files, error) in cases.items():
+            with self.subTest(name), patch.object(LauncherGUI, 'launch_main_app') as mock_launch:
+                launcher = self._launcher_in(files)
+                delays = list(launcher._steps())
 
+                self.assertTrue(all(isinstance(delay, int) for delay in delays))
+                launcher.error_var.set.assert_called_once_with(error)
+                mock_launch.assert_not_called()
 
-def run_tests():
-    """Run all tests with coverage information."""
-    loader = unittest.TestLoader()
-    suite = unittest.TestSuite()
-    
-    # Добавляем все тесты
-    suite.addTests(loader.loadTestsFromTestCase(TestConfigManager))
-    suite.addTests(loader.loadTestsFromTestCase(TestAppManager))
-    suite.addTests(loader.loadTestsFromTestCase(TestStatistics))
-    suite.addTests(loader.loadTestsFromTestCase(TestConfigManagerAdvanced))
-    suite.addTests(loader.loadTestsFromTestCase(TestAppManagerAdvanced))
-    suite.addTests(loader.loadTestsFromTestCase(TestBotFunctions))
-    suite.addTests(loader.loadTestsFromTestCase(TestConfigManagerComplete))
-    suite.addTests(loader.loadTestsFromTestCase(TestSingleton))
-    suite.addTests(loader.loadTestsFromTestCase(TestAppManagerComplete))
-    suite.addTests(loader.loadTestsFromTestCase(TestBotCore))
-    suite.addTests(loader.loadTestsFromTestCase(TestLauncherGUI))
-    suite.addTests(loader.loadTestsFromTestCase(TestGUIApp))
-    suite.addTests(loader.loadTestsFromTestCase(TestLauncherGUI))
-    
-    # Запускаем тесты
-    runner = unittest.TextTestRunner(verbosity=2)
-    result = runner.run(suite)
-    
-    # Выводим статистику
-    print("\n" + "="*60)
-    print("📊 СТАТИСТИКА ТЕСТОВ")
-    print("="*60)
-    print(f"Всего тестов: {result.testsRun}")
-    print(f"Успешно: {result.testsRun - len(result.failures) - len(result.errors)}")
-    print(f"Провалено: {len(result.failures)}")
-    print(f"Ошибок: {len(result.errors)}")
-    
-    if result.failures:
-        print("\n❌ Проваленные тесты:")
-        for test, traceback in result.failures:
-            print(f"  - {test}")
-    
-    if result.errors:
-        print("\n⚠️  Тесты с ошибками:")
-        for test, traceback in result.errors:
-            print(f"  - {test}")
-    
-    if result.wasSuccessful():
-        print("\n✅ Все тесты прошли успешно!")
-    else:
-        print("\n❌ Некоторые тесты не прошли")
-    
-    print("="*60)
-    
-    return result.wasSuccessful()
+    def test_steps_launch_main_app(self):
+        """Test the launch steps run to the end and launch the main app."""
+        from launcher import LauncherGUI
+
+        done = Future()
+        done.set_result(None)
+        with patch('launcher._EXEC') as mock_exec, \
+                patch.object(LauncherGUI, 'launch_main_app') as mock_launch:
+            mock_exec.submit.return_value = done
+            launcher = self._launcher_in(
+                ('gui.py', 'bot.py', 'app_manager.py', 'config.py', 'responses.py'),
+                env=b'TELEGRAM_BOT_TOKEN=123:abc\nADMIN_ID=42\n')
+            delays = list(launcher._steps())
+
+        self.assertTrue(all(isinstance(delay, int) for delay in delays))
+        mock_exec.submit.assert_any_call(launcher._init_config)
+        launcher.error_var.set.assert_not_called()
+        launcher.status_var.set.assert_called_with("Готово! Запуск...")
+        mock_launch.assert_called_once_with()
+
+    def test_drive_reschedules_until_exhausted(self):
+        """Test _drive reschedules itself through root.after until the steps run out."""
+        launcher = self._launcher_in(())
+        launcher.root.after_idle.assert_called_once_with(launcher._drive)
+
+        # root.after сразу вызывает колбэк, как будто задержка уже прошла
+        launcher.root.after.side_effect = lambda delay, callback: callback()
+        launcher._launch_steps = iter([5, 7])
+        launcher._drive()
+
+        self.assertEqual(launcher.root.after.call_args_list,
+                         [((5, launcher._drive),), ((7, launcher._drive),)])
+        launcher.error_var.set.assert_not_called()
+
+    def test_drive_reports_step_error(self):
+        """Test _drive shows an error and stops rescheduling when a step raises."""
+        launcher = self._launcher_in(())
+
+        def failing_steps():
+            yield 5
+            raise RuntimeError("boom")
+
+        launcher.root.after.side_effect = lambda delay, callback: callback()
+        launcher._launch_steps = failing_steps()
+        launcher._drive()
+
+        launcher.root.after.assert_called_once_with(5, launcher._drive)
+        launcher.error_var.set.assert_called_once_with("ERROR: Неожиданная ошибка: boom")
 
 
 if __name__ == "__main__":
-    success = run_tests()
-    sys.exit(0 if success else 1)
\ No newline at end of file
+    unittest.main(verbosity=1)
@@ -4,31 +4,120 @@ Version Manager для проекта SONYA.
 Автоматически управляет версиями, changelog и обновляет файлы проекта.
 """
 
+import io
+import mmap
+import os
 import re
-import json
-from datetime import datetime
+import sys
+import tempfile
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+
+# Файлы проекта лежат рядом с модулем, пути считаются один раз
+_PROJECT_ROOT = Path(__file__).resolve().parent
+_CHANGELOG_PATH = _PROJECT_ROOT / "CHANGELOG.md"
+_README_PATH = _PROJECT_ROOT / "README.md"
+
+# Шаблоны README компилируются один раз при импорте модуля
+_VERSION_BADGE_RE = re.compile(r'!\[Version\]\([^)]*version-([0-9]+\.[0-9]+\.[0-9]+)-[a-z]+\)')
+_VERSION_BADGE_BYTES_RE = re.compile(rb'!\[Version\]\([^)]*version-([0-9]+\.[0-9]+\.[0-9]+)-[a-z]+\)')
+
+# Все места с версией и со статистикой заменяются за один проход по README:
+# в подстановке по m.lastgroup выбирается нужная строка. Подвал с описанием
+# в скобках стоит раньше короткой строки версии, чтобы забрать её целиком
+_VERSION_SUB_RE = re.compile(
+    r'(?P<badge>!\[Version\]\([^)]*version-[0-9]+\.[0-9]+\.[0-9]+-blue\))'
+    r'|(?P<footer>\*\*Версия:\*\* [0-9]+\.[0-9]+\.[0-9]+ \([^)]+\))'
+    r'|(?P<line>\*\*Версия:\*\* [0-9]+\.[0-9]+\.[0-9]+)'
+)
+_STATS_RE = re.compile(
+    r'(?P<tests_badge>!\[Tests\]\([^)]*tests-[0-9]+%20✅[^)]*\))'
+    r'|(?P<coverage_badge>!\[Coverage\]\([^)]*coverage-[0-9]+%25[^)]*\))'
+    r'|(?P<tests_line>\*\*Всего тестов:\*\* [0-9]+ ✅)'
+    r'|(?P<coverage_line>\*\*Покрытие кода:\*\* [0-9]+%)'
+    r'|(?P<footer>\*\*Тесты:\*\* [0-9]+ ✅ \| Покрытие: [0-9]+%)'
+)
+
+# Начало записи changelog вида "## [x.y.z]"
+_FIRST_ENTRY_RE = re.compile(r'(?m)^## \[')
+
+# Разделы записи changelog: (ключ в changes, эмодзи, заголовок) в порядке вывода
+_CHANGE_KINDS = (
+    ('added', '🎯', 'Added'),
+    ('changed', '🔧', 'Changed'),
+    ('fixed', '🐛', 'Fixed'),
+    ('removed', '❌', 'Removed'),
+    ('security', '🚨', 'Security'),
+)
+# Известные типы изменений: множество строится один раз при импорте, а не на каждую запись
+_KNOWN_CHANGE_KINDS = frozenset(key for key, _, _ in _CHANGE_KINDS)
 
 class VersionManager:
     """Управляет версиями и changelog проекта."""
 
     def __init__(self):
-        self.project_root = Path(__file__).parent
-        self.changelog_path = self.project_root / "CHANGELOG.md"
-        self.readme_path = self.project_root / "README.md"
+        self.project_root = _PROJECT_ROOT
+        self.changelog_path = _CHANGELOG_PATH
+        self.readme_path = _README_PATH
+        # Версия из README (строкой и числами); обновляется при каждой записи README
+        self._version_cache: Optional[str] = None
+        self._version_tuple: Optional[Tuple[int, int, int]] = None
+
+    def _invalidate(self) -> None:
+        """Сбросить кеш версии (например, если README правили снаружи)."""
+        self._version_cache = None
+        self._version_tuple = None
+
+    def _set_version(self, version: str) -> None:
+        """Положить версию в кеш строкой и числами."""
+        major, minor, patch = map(int, version.split('.'))
+        self._version_cache = version
+        self._version_tuple = (major, minor, patch)
+
+    @staticmethod
+    def _find_version(content: str) -> Optional[str]:
+        """Найти версию в тексте README по бейджу."""
+        version_match = _VERSION_BADGE_RE.search(content)
+        return version_match.group(1) if version_match else None
+
+    def _remember_version(self, content: str) -> None:
+        """Запомнить версию из только что записанного текста README."""
+        version = self._find_version(content)
+        if version:
+            self._set_version(version)
+        else:
+            self._invalidate()
 
     def get_current_version(self) -> str:
         """Получить текущую версию из README.md."""
-        with open(self.readme_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        version_match = re.search(r'!\[Version\]\([^)]*version-([0-9]+\.[0-9]+\.[0-9]+)-[a-z]+\)', content)
-        if version_match:
-            return version_match.group(1)
+        if self._version_cache is not None:
+            return self._version_cache
+
+        # Бейдж ищем прямо в отображенном в память файле, не декодируя весь README
+        version = None
+        with open(self.readme_path, 'rb') as f:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    version_match = _VERSION_BADGE_BYTES_RE.search(mm)
+                    # Группу берем до закрытия mmap: match ссылается на его буфер
+                    if version_match:
+                        version = version_match.group(1).decode('ascii')
+            except ValueError:
+                # Пустой файл отобразить нельзя, версии в нем все равно нет
+                pass
+
+        if version is not None:
+            self._set_version(version)
+            return self._version_cache
 
         raise ValueError("Не удалось найти версию в README.md")
 
+    def get_current_version_tuple(self) -> Tuple[int, int, int]:
+        """Получить текущую версию как (major, minor, patch)."""
+        if self._version_tuple is None:
+            self.get_current_version()
+        return self._version_tuple
+
     def bump_version(self, bump_type: str = 'patch') -> str:
         """
         Увеличить версию.
@@ -39,8 +128,12 @@ class VersionManager:
         Returns:
             Новая версия
         """
-        current = self.get_current_version()
-        major, minor, patch = map(int, current.split('.'))
+        return self._bumped(self.get_current_version_tuple(), bump_type)
+
+    @staticmethod
+    def _bumped(current: Tuple[int, int, int], bump_type: str) -> str:
+        """Вернуть версию, следующую за current для данного типа увеличения."""
+        major, minor, patch = current
 
         if bump_type == 'major':
             major += 1
@@ -57,131 +150,134 @@ class VersionManager:
         new_version = f"{major}.{minor}.{patch}"
         return new_version
 
-    def update_readme_version(self, new_version: str, description: str = "") -> None:
-        """Обновить версию в README.md."""
-        with open(self.readme_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Обновить бейдж версии
-        content = re.sub(
-            r'!\[Version\]\([^)]*version-[0-9]+\.[0-9]+\.[0-9]+-blue\)',
-            f'![Version](https://img.shields.io/badge/version-{new_version}-blue)',
-            content
-        )
-
-        # Обновить текущую версию в секции версионирования
-        content = re.sub(
-            r'\*\*Версия:\*\* [0-9]+\.[0-9]+\.[0-9]+',
-            f'**Версия:** {new_version}',
-            content
-        )
-
-        # Обновить информацию в конце файла
-        content = re.sub(
-            r'\*\*Версия:\*\* [0-9]+\.[0-9]+\.[0-9]+ \([^)]+\)',
-            f'**Версия:** {new_version} ({description})' if description else f'**Версия:** {new_version}',
-            content
-        )
-
-        with open(self.readme_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-
-    def update_readme_stats(self, test_count: int, coverage: int) -> None:
-        """Обновить статистику тестов в README.md."""
-        with open(self.readme_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Обновить бейдж тестов
-        content = re.sub(
-            r'!\[Tests\]\([^)]*tests-[0-9]+%20✅[^)]*\)',
-            f'![Tests](https://img.shields.io/badge/tests-{test_count}%20✅-brightgreen)',
-            content
-        )
-
-        # Обновить бейдж покрытия
-        content = re.sub(
-            r'!\[Coverage\]\([^)]*coverage-[0-9]+%25[^)]*\)',
-            f'![Coverage](https://img.shields.io/badge/coverage-{coverage}%25-orange)',
-            content
-        )
-
-        # Обновить статистику в секции тестирования
-        content = re.sub(
-            r'\*\*Всего тестов:\*\* [0-9]+ ✅',
-            f'**Всего тестов:** {test_count} ✅',
-            content
-        )
-
-        content = re.sub(
-            r'\*\*Покрытие кода:\*\* [0-9]+%',
-            f'**Покрытие кода:** {coverage}%',
-            content
-        )
-
-        # Обновить в конце файла
-        content = re.sub(
-            r'\*\*Тесты:\*\* [0-9]+ ✅ \| Покрытие: [0-9]+%',
-            f'**Тесты:** {test_count} ✅ | Покрытие: {coverage}%',
-            content
-        )
-
-        with open(self.readme_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-
-    def add_changelog_entry(self, version: str, changes: Dict[str, List[str]],
-                          author: str = "Sonya AI Assistant") -> None:
-        """Добавить новую запись в changelog."""
-        date = datetime.now().strftime("%Y-%m-%d")
-        emoji_map = {
-            'added': '🎯',
-            'changed': '🔧',
-            'fixed': '🐛',
-            'removed': '❌',
-            'security': '🚨'
+    @staticmethod
+    def _atomic_write(path: Path, content: str) -> None:
+        """Записать файл через временный файл и os.replace, чтобы не оставить его недописанным."""
+        # Уникальное имя рядом с файлом: параллельные запуски не пишут в один и тот же .tmp
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + '.', suffix='.tmp')
+        try:
+            with open(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            # mkstemp создает файл с правами 0600, возвращаем права исходного файла
+            if path.exists():
+                os.chmod(tmp, path.stat().st_mode & 0o7777)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @staticmethod
+    def _apply_version(content: str, new_version: str, description: str = "") -> str:
+        """Подставить новую версию в текст README."""
+        # Бейдж, строка в секции версионирования и подвал файла
+        replacements = {
+            'badge': f'![Version](https://img.shields.io/badge/version-{new_version}-blue)',
+            'line': f'**Версия:** {new_version}',
+            'footer': f'**Версия:** {new_version} ({description})' if description else f'**Версия:** {new_version}',
+        }
+        return _VERSION_SUB_RE.sub(lambda m: replacements[m.lastgroup], content)
+
+    @staticmethod
+    def _apply_stats(content: str, test_count: int, coverage: int) -> str:
+        """Подставить статистику тестов в текст README."""
+        # Бейджи, секция тестирования и подвал файла
+        replacements = {
+            'tests_badge': f'![Tests](https://img.shields.io/badge/tests-{test_count}%20✅-brightgreen)',
+            'coverage_badge': f'![Coverage](https://img.shields.io/badge/coverage-{coverage}%25-orange)',
+            'tests_line': f'**Всего тестов:** {test_count} ✅',
+            'coverage_line': f'**Покрытие кода:** {coverage}%',
+            'footer': f'**Тесты:** {test_count} ✅ | Покрытие: {coverage}%',
         }
+        return _STATS_RE.sub(lambda m: replacements[m.lastgroup], content)
+
+    def _write_readme(self, original: str, content: str) -> bool:
+        """Записать README, только если текст изменился. Вернуть True, если запись была."""
+        if content == original:
+            return False
+
+        self._atomic_write(self.readme_path, content)
+        self._remember_version(content)
+        return True
+
+    def update_readme_version(self, new_version: str, description: str = "") -> bool:
+        """Обновить версию в README.md. Вернуть False, если менять было нечего."""
+        original = self.readme_path.read_text(encoding='utf-8')
+
+        content = self._apply_version(original, new_version, description)
+
+        return self._write_readme(original, content)
+
+    def update_readme_stats(self, test_count: int, coverage: int) -> bool:
+        """Обновить статистику тестов в README.md. Вернуть False, если менять было нечего."""
+        original = self.readme_path.read_text(encoding='utf-8')
+
+        content = self._apply_stats(original, test_count, coverage)
+
+        return self._write_readme(original, content)
 
-        # Создать новую запись
-        entry_lines = [
-            f"## [{version}] - {date} - {author}",
-            ""
+    @staticmethod
+    def _build_entry(version: str, changes: Dict[str, List[str]], author: str) -> str:
+        """Собрать текст одной записи changelog."""
+        # datetime нужен только здесь: команды current/bump его не импортируют
+        from datetime import date
+
+        date_str = date.today().isoformat()
+
+        # Создать новую запись: каждая строка сразу пишется в буфер
+        buf = io.StringIO()
+        buf.write(f"## [{version}] - {date_str} - {author}\n\n")
+
+        # Известные разделы идут в порядке _CHANGE_KINDS, нестандартные - после них
+        sections = [
+            *((emoji, title, changes.get(key)) for key, emoji, title in _CHANGE_KINDS),
+            *(('•', key.title(), items) for key, items in changes.items() if key not in _KNOWN_CHANGE_KINDS),
         ]
 
-        for change_type, change_list in changes.items():
-            if change_list:
-                emoji = emoji_map.get(change_type, '•')
-                entry_lines.append(f"### {emoji} {change_type.title()}")
-                for change in change_list:
-                    entry_lines.append(f"- {change}")
-                entry_lines.append("")
+        for emoji, title, change_list in sections:
+            if not change_list:
+                continue
+            buf.write(f"### {emoji} {title}\n")
+            for change in change_list:
+                buf.write(f"- {change}\n")
+            buf.write("\n")
 
-        entry_lines.append("")
+        return buf.getvalue()
 
+    def _prepend_entries(self, entries: str) -> None:
+        """Вставить готовые записи перед первой записью changelog и записать файл."""
         # Прочитать существующий changelog
         if self.changelog_path.exists():
-            with open(self.changelog_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            # Найти место после заголовка
-            lines = content.split('\n')
-            insert_pos = 0
-            for i, line in enumerate(lines):
-                if line.startswith('## [') and i > 0:
-                    insert_pos = i
-                    break
-
-            # Вставить новую запись
-            new_content = '\n'.join(lines[:insert_pos]) + '\n' + '\n'.join(entry_lines) + '\n'.join(lines[insert_pos:])
+            content = self.changelog_path.read_text(encoding='utf-8')
+
+            # Найти первую запись (первую строку файла не считаем)
+            first_entry = _FIRST_ENTRY_RE.search(content, 1)
+            if first_entry:
+                insert_pos = first_entry.start()
+            else:
+                # Записей еще нет: новая идет сразу после шапки
+                if not content.endswith('\n'):
+                    content += '\n'
+                insert_pos = len(content)
+
+            # Вставить новые записи одним срезом, без разбиения на строки
+            new_content = content[:insert_pos] + entries + content[insert_pos:]
         else:
             # Создать новый changelog
-            new_content = "# 📋 Changelog\n\nВсе важные изменения в проекте SONYA - Gaming Applications Manager.\n\n" + '\n'.join(entry_lines)
+            new_content = "# 📋 Changelog\n\nВсе важные изменения в проекте SONYA - Gaming Applications Manager.\n\n" + entries
+
+        self._atomic_write(self.changelog_path, new_content)
 
-        with open(self.changelog_path, 'w', encoding='utf-8') as f:
-            f.write(new_content)
+    def add_changelog_entry(self, version: str, changes: Dict[str, List[str]],
+                          author: str = "Sonya AI Assistant") -> None:
+        """Добавить новую запись в changelog."""
+        self._prepend_entries(self._build_entry(version, changes, author))
 
     def create_release(self, bump_type: str = 'patch',
                        changes: Dict[str, List[str]] = None,
                        description: str = "",
-                       author: str = "Sonya AI Assistant") -> str:
+                       author: str = "Sonya AI Assistant",
+                       test_count: Optional[int] = None,
+                       coverage: Optional[int] = None) -> str:
         """
         Создать новый релиз.
 
@@ -190,6 +286,8 @@ class VersionManager:
             changes: Словарь изменений по типам
             description: Описание релиза
             author: Автор изменений
+            test_count: Количество тестов (вместе с coverage обновляет статистику)
+            coverage: Процент покрытия
 
         Returns:
             Новая версия
@@ -203,32 +301,95 @@ class VersionManager:
         # Добавить запись в changelog
         self.add_changelog_entry(new_version, changes, author)
 
-        # Обновить README
-        self.update_readme_version(new_version, description)
+        # Обновить README: одно чтение и одна запись на все правки
+        original = self.readme_path.read_text(encoding='utf-8')
+        content = self._apply_version(original, new_version, description)
+        if test_count is not None and coverage is not None:
+            content = self._apply_stats(content, test_count, coverage)
+        readme_status = "Обновлен README.md" if self._write_readme(original, content) else "README.md без изменений"
 
-        print(f"✅ Создан релиз {new_version}")
-        print(f"📝 Обновлен CHANGELOG.md")
-        print(f"📖 Обновлен README.md")
+        sys.stdout.write(f"✅ Создан релиз {new_version}\n📝 Обновлен CHANGELOG.md\n📖 {readme_status}\n")
 
         return new_version
 
+    def create_releases(self, specs: List[Dict]) -> List[str]:
+        """
+        Создать несколько релизов подряд за одно чтение и одну запись каждого файла.
+
+        Args:
+            specs: Список словарей с аргументами create_release
+                (bump_type, changes, description, author, test_count, coverage)
+
+        Returns:
+            Список новых версий в порядке specs
+        """
+        original = self.readme_path.read_text(encoding='utf-8')
+        version = self._find_version(original)
+        if version is None:
+            raise ValueError("Не удалось найти версию в README.md")
+
+        # Версия идет через цикл локально: кеш обновит только _write_readme,
+        # чтобы ошибка в середине пакета не оставила в нем незаписанную версию
+        content = original
+        versions = []
+        entries = []
+        for spec in specs:
+            # Каждый релиз считается от версии, которая оказалась в README после предыдущего
+            current = tuple(map(int, version.split('.')))
+            new_version = self._bumped(current, spec.get('bump_type', 'patch'))
+            content = self._apply_version(content, new_version, spec.get('description', ""))
+            test_count, coverage = spec.get('test_count'), spec.get('coverage')
+            if test_count is not None and coverage is not None:
+                content = self._apply_stats(content, test_count, coverage)
+            version = self._find_version(content)
+
+            versions.append(new_version)
+            entries.append(self._build_entry(new_version, spec.get('changes') or {},
+                                             spec.get('author', "Sonya AI Assistant")))
+
+        if not versions:
+            return versions
+
+        # Новые записи идут сверху, как при последовательных вызовах create_release
+        self._prepend_entries(''.join(reversed(entries)))
+
+        readme_status = "Обновлен README.md" if self._write_readme(original, content) else "README.md без изменений"
+
+        sys.stdout.write(f"✅ Создано релизов: {len(versions)} ({', '.join(versions)})\n"
+                         f"📝 Обновлен CHANGELOG.md\n📖 {readme_status}\n")
+
+        return versions
+
 def main():
     """Основная функция для командной строки."""
     import argparse
 
     parser = argparse.ArgumentParser(description="Version Manager для SONYA")
-    parser.add_argument('command', choices=['bump', 'stats', 'current'], help='Команда')
+    parser.add_argument('command', nargs='?', choices=['bump', 'stats', 'current'], help='Команда')
     parser.add_argument('--type', choices=['major', 'minor', 'patch'], default='patch',
                        help='Тип увеличения версии')
     parser.add_argument('--description', default="", help='Описание релиза')
     parser.add_argument('--test-count', type=int, help='Количество тестов')
     parser.add_argument('--coverage', type=int, help='Процент покрытия')
+    parser.add_argument('--batch-releases', metavar='FILE',
+                       help='JSON-файл со списком релизов для create_releases')
 
     args = parser.parse_args()
+    if args.command is None and args.batch_releases is None:
+        parser.error('укажите команду или --batch-releases')
+    if args.command is not None and args.batch_releases is not None:
+        parser.error(f'--batch-releases нельзя совмещать с командой {args.command}')
 
     vm = VersionManager()
 
-    if args.command == 'current':
+    if args.batch_releases is not None:
+        # json нужен только для пакетного режима
+        import json
+
+        with open(args.batch_releases, encoding='utf-8') as f:
+            vm.create_releases(json.load(f))
+
+    elif args.command == 'current':
         print(f"Текущая версия: {vm.get_current_version()}")
 
     elif args.command == 'bump':
@@ -237,8 +398,10 @@ def main():
 
     elif args.command == 'stats':
         if args.test_count is not None and args.coverage is not None:
-            vm.update_readme_stats(args.test_count, args.coverage)
-            print(f"✅ Обновлена статистика: {args.test_count} тестов, {args.coverage}% покрытия")
+            if vm.update_readme_stats(args.test_count, args.coverage):
+                print(f"✅ Обновлена статистика: {args.test_count} тестов, {args.coverage}% покрытия")
+            else:
+                print("Статистика в README.md уже актуальна")
         else:
             print("Ошибка: укажите --test-count и --coverage")
 